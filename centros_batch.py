@@ -0,0 +1,66 @@
+# Implementado por Nelson Esteban Hernandez Soto durante el curso de Diseño Sísmico de Mampostería
+# e-mail: nhernandez@unal.edu.co
+# Universidad Nacional de Colombia - 2025
+
+"""
+Análisis por lotes sin interfaz gráfica: calcula el centro de rigidez, la excentricidad y las sumas de
+rigidez de muchas configuraciones guardadas (.json o .crm) repartiéndolas en un grupo de procesos.
+
+Uso: python centros_batch.py proyectos/*.json --format csv --workers 8 > resultados.csv
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from multiprocessing import Pool
+from centros_core import load_building, analyze, json_to_binary, binary_to_json, BINARY_MODEL_EXTENSION
+
+FIELDS = ['file', 'storey', 'elements', 'cm_x', 'cm_y', 'cr_x', 'cr_y', 'ex', 'ey', 'sum_kx', 'sum_ky', 'sum_ky_x', 'sum_kx_y', 'error']
+
+def analyze_file(filepath):
+    # Una fila por piso; los modelos de un solo piso siguen dando una sola fila.
+    try: return [dict(analyze(storey.elements, storey.center_of_mass), file=filepath, storey=storey.name) for storey in load_building(filepath).storeys]
+    except Exception as e: return [{'file': filepath, 'error': f"{type(e).__name__}: {e}"}]
+
+def convert_file(filepath):
+    # .json -> .crm y .crm -> .json, junto al archivo original.
+    root, ext = os.path.splitext(filepath)
+    try:
+        if ext.lower() == BINARY_MODEL_EXTENSION: target = root + ".json"; binary_to_json(filepath, target)
+        else: target = root + BINARY_MODEL_EXTENSION; json_to_binary(filepath, target)
+        return {'file': filepath, 'output': target}
+    except Exception as e: return {'file': filepath, 'error': f"{type(e).__name__}: {e}"}
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern): paths.extend(sorted(glob.glob(os.path.join(pattern, '*.json')) + glob.glob(os.path.join(pattern, '*' + BINARY_MODEL_EXTENSION))))
+        else: paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcula CR y excentricidades de configuraciones guardadas.")
+    parser.add_argument('paths', nargs='+', help="archivos .json/.crm, patrones glob o carpetas")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help="formato de salida (por defecto csv)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="procesos en paralelo (por defecto todos los núcleos)")
+    parser.add_argument('--chunksize', type=int, default=None, help="archivos por tarea enviada a cada proceso")
+    parser.add_argument('--ordered', action='store_true', help="mantener el orden de entrada en la salida")
+    parser.add_argument('--convert', action='store_true', help=f"convertir entre .json y {BINARY_MODEL_EXTENSION} en lugar de analizar")
+    args = parser.parse_args(argv)
+    paths = expand_paths(args.paths); workers = max(1, min(args.workers or 1, len(paths) or 1))
+    chunksize = args.chunksize or max(1, len(paths) // (workers * 4))
+    if args.format == 'csv': writer = csv.DictWriter(sys.stdout, fieldnames=['file', 'output', 'error'] if args.convert else FIELDS, extrasaction='ignore'); writer.writeheader(); emit = writer.writerow
+    else: emit = lambda result: sys.stdout.write(json.dumps(result) + "\n")
+    failures = 0
+    with Pool(workers) as pool:
+        results = (pool.imap if args.ordered else pool.imap_unordered)(convert_file if args.convert else analyze_file, paths, chunksize)
+        for rows in results:
+            for result in (rows if isinstance(rows, list) else [rows]): failures += 'error' in result; emit(result)
+            sys.stdout.flush()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# Implementado por Nelson Esteban Hernandez Soto durante el curso de Diseño Sísmico de Mampostería
+# e-mail: nhernandez@unal.edu.co
+# Universidad Nacional de Colombia - 2025
+
+"""
+Banco de pruebas de rendimiento: genera planos sintéticos (aleatorios o en retícula, de 10^2 a 10^6 elementos) y
+mide las rutas críticas de la aplicación sin abrir ventanas, sobre un lienzo que solo registra los ítems creados.
+Los resultados se escriben en JSON y se pueden comparar contra una ejecución anterior.
+
+Uso: python centros_bench.py --sizes 100 10000 1000000 --output actual.json --baseline base.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from centros_core import Column, Wall, Building, SpatialIndex, model_bounds, BINARY_MODEL_EXTENSION
+from centros_interactivo import App
+try: import numpy as np
+except ImportError: np = None
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+LAYOUTS = ('random', 'grid')
+METRICS = ('seconds', 'bytes_per_element', 'items')  # valores que se comparan con la línea base (menor es mejor)
+
+# --- Planos sintéticos ---
+def synthetic_plan(count, layout='random', seed=0):
+    # Devuelve la lista de elementos en el esquema JSON: ~80 % columnas y ~20 % muros, con una densidad de un
+    # elemento por cada ~16 m², en posiciones aleatorias o sobre una retícula de ejes cada 4 m.
+    rng = random.Random(seed); side = max(1, round((count * 16) ** 0.5)); elements = []
+    for i in range(count):
+        if layout == 'grid':
+            per_row = max(1, round(count ** 0.5)); x, y = (i % per_row) * 4.0, (i // per_row) * 4.0
+        else: x, y = rng.uniform(0, side), rng.uniform(0, side)
+        if i % 5: elements.append({'type': 'column', 'x': x, 'y': y, 'width': rng.choice([0.3, 0.4, 0.5]), 'height': rng.choice([0.3, 0.4, 0.5])})
+        else: elements.append({'type': 'wall', 'x': x, 'y': y, 'length': rng.choice([2.0, 3.0, 4.0]), 'thickness': 0.15, 'orientation': rng.choice('HV')})
+    return elements
+
+# --- Lienzo y aplicación sin interfaz ---
+class RecordingCanvas:
+    # Sustituto de tk.Canvas: guarda coordenadas y etiquetas de cada ítem y cuenta los ítems creados.
+    def __init__(self, width=1280, height=800):
+        self.width, self.height = width, height; self.items = {}; self.next_id = 0; self.created = 0
+    def winfo_width(self): return self.width
+    def winfo_height(self): return self.height
+    def _create(self, coords, tags=(), **options):
+        self.next_id += 1; self.created += 1
+        self.items[self.next_id] = [list(coords), (tags,) if isinstance(tags, str) else tuple(tags)]; return self.next_id
+    def create_rectangle(self, *coords, **options): return self._create(coords, **options)
+    def create_line(self, *coords, **options): return self._create(coords, **options)
+    def create_text(self, *coords, **options): return self._create(coords, **options)
+    def create_oval(self, *coords, **options): return self._create(coords, **options)
+    def _find(self, tag_or_id):
+        if isinstance(tag_or_id, int): return [tag_or_id] if tag_or_id in self.items else []
+        return [item for item, (_, tags) in self.items.items() if tag_or_id == 'all' or tag_or_id in tags]
+    def delete(self, *tags_or_ids):
+        for tag_or_id in tags_or_ids:
+            for item in self._find(tag_or_id): del self.items[item]
+    def coords(self, item, *coords):
+        if coords: self.items[item][0] = list(coords)
+        return self.items[item][0]
+    def move(self, tag, dx, dy):
+        for item in self._find(tag): self.items[item][0] = [c + (dx if i % 2 == 0 else dy) for i, c in enumerate(self.items[item][0])]
+    def scale(self, tag, x, y, fx, fy):
+        for item in self._find(tag): self.items[item][0] = [(x + (c - x) * fx) if i % 2 == 0 else (y + (c - y) * fy) for i, c in enumerate(self.items[item][0])]
+    def itemconfig(self, item, **options): pass
+    def tag_raise(self, tag, above=None): pass
+    def tag_lower(self, tag, below=None): pass
+    def config(self, **options): pass
+
+class _Variable:
+    def __init__(self, value=None): self.value = value
+    def get(self): return self.value
+    def set(self, value): self.value = value
+class _Widget:
+    def config(self, **options): pass
+    def current(self, index=None): pass
+
+class HeadlessApp(App):
+    # App sin ventana: mismo estado y mismos métodos, con sustitutos para los widgets. El planificador de cuadros
+    # no se ejecuta solo; las mediciones llaman a scheduler.flush() para incluir el costo del cuadro.
+    tk = None  # sin intérprete Tcl: un atributo de Tk inexistente falla en lugar de recurrir a __getattr__
+    def __init__(self, width=1280, height=800):
+        self._init_state(); self.canvas = RecordingCanvas(width, height)
+        self.move_step, self.defer_recalc = _Variable(0.1), _Variable(False)
+        self.cm_x_var, self.cm_y_var = _Variable("0.0"), _Variable("0.0")
+        self.cr_x_label = self.cr_y_label = self.ex_label = self.ey_label = self.storey_selector = self.design_variables_label = _Widget()
+        self.inspector_labels = {key: _Widget() for key in ('tipo', 'id', 'x', 'y', 'dim_1', 'dim_2', 'orientación')}
+    def after(self, ms, func=None, *args): return 'after'
+    def after_idle(self, func, *args): return 'after'
+    def after_cancel(self, job): pass
+    def update_idletasks(self): pass
+    def title(self, text=None): pass
+    def config(self, **options): pass
+
+class _Event:
+    def __init__(self, x, y, delta=0): self.x, self.y, self.delta = x, y, delta
+
+# --- Mediciones ---
+def _timed(func, repeat):
+    # Mediana de repeat ejecuciones (en segundos).
+    times = []
+    for _ in range(repeat): start = time.perf_counter(); func(); times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def _load_app(elements_data):
+    Column.count = Wall.count = 0; app = HeadlessApp()
+    building = Building.from_data({'center_of_mass': [0.0, 0.0], 'elements': elements_data}); building.recompute()
+    building.storeys[0].spatial_index = SpatialIndex(building.storeys[0].elements); app.building, app.storey = building, building.storeys[0]
+    return app
+
+def run_case(count, layout, repeat=5, operations=200, seed=0):
+    # Devuelve una lista de resultados {'case', 'layout', 'elements', métricas...} para un plano sintético.
+    elements_data = synthetic_plan(count, layout, seed); results = []
+    def record(case, **metrics): results.append(dict(case=case, layout=layout, elements=count, **metrics))
+    tracemalloc.start(); before = tracemalloc.get_traced_memory()[0]; app = _load_app(elements_data)
+    model_bytes = tracemalloc.get_traced_memory()[0] - before; tracemalloc.stop()
+    record('model_memory', bytes_per_element=model_bytes / count)
+    app.fit_to_view()
+    record('update_calculations', seconds=_timed(app.update_calculations, repeat))
+    record('resync', seconds=_timed(lambda: app.rigidity.resync(app.elements), repeat))
+    record('fit_to_view_bounds', seconds=_timed(lambda: model_bounds(app.elements), repeat))
+    def redraw(): app.canvas.created = 0; app.redraw_canvas()
+    record('redraw_canvas', seconds=_timed(redraw, repeat), items=app.canvas.created)
+    def pan_frame(): app.scheduler.pan(3, 2); app.scheduler.flush()
+    record('pan_frame', seconds=_timed(pan_frame, repeat))
+    # Clic sobre elementos al azar (y sobre vacíos) como en on_mouse_down/on_mouse_up.
+    rng = random.Random(seed); elements = list(itertools.islice(app.elements, 100000))
+    points = [app.model_to_view(elem.x, elem.y) if i % 2 else (rng.uniform(0, app.canvas.width), rng.uniform(0, app.canvas.height)) for i, elem in enumerate(rng.choices(elements, k=operations))]
+    def clicks():
+        for vx, vy in points: event = _Event(vx, vy); app.on_mouse_down(event); app.on_mouse_up(event)
+    record('hit_test', seconds=_timed(clicks, repeat) / operations)
+    # Arrastre de un elemento por cuadro (mover + recalcular + cuadro) y su registro en el historial.
+    def drag():
+        app._set_selected(rng.choice(elements)); app.on_mouse_down(_Event(*app.model_to_view(app.selected_element.x, app.selected_element.y)))
+        for step in range(operations): app.on_mouse_move(_Event(*app.model_to_view(app.selected_element.x + 0.01, app.selected_element.y))); app.scheduler.flush()
+        app.on_mouse_up(_Event(0, 0))
+    record('drag_frame', seconds=_timed(drag, repeat) / operations)
+    def edits():
+        for elem in rng.choices(elements, k=operations): app._record_undo({'kind': 'move', 'element': app._move_element(elem, 0.1, 0.0), 'dx': 0.1, 'dy': 0.0})
+    def undos():
+        for _ in range(operations): app.undo_last_action()
+        app.scheduler.flush()
+    record('record_undo', seconds=_timed(edits, repeat) / operations)
+    record('undo', seconds=_timed(undos, repeat) / operations)
+    with tempfile.TemporaryDirectory() as folder:
+        for extension in ('.json', BINARY_MODEL_EXTENSION):
+            if extension == BINARY_MODEL_EXTENSION and np is None: continue
+            path = os.path.join(folder, 'plano' + extension); name = extension.lstrip('.')
+            record(f'save_{name}', seconds=_timed(lambda: app._write_configuration(path), max(1, repeat // 2)))
+            record(f'load_{name}', seconds=_timed(lambda: app.open_configuration(path), max(1, repeat // 2)))
+    return results
+
+# --- Comparación con la línea base ---
+def compare(results, baseline, tolerance):
+    # Devuelve las métricas que empeoraron más de tolerance (fracción) respecto a la línea base.
+    previous = {(r['case'], r['layout'], r['elements']): r for r in baseline['results']}; regressions = []
+    for result in results:
+        old = previous.get((result['case'], result['layout'], result['elements']))
+        if old is None: continue
+        for metric in METRICS:
+            if metric in result and old.get(metric) and result[metric] > old[metric] * (1 + tolerance):
+                regressions.append({'case': result['case'], 'layout': result['layout'], 'elements': result['elements'], 'metric': metric,
+                                    'baseline': old[metric], 'current': result[metric], 'ratio': result[metric] / old[metric]})
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el rendimiento del modelo, la E/S y el dibujo con planos sintéticos.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="cantidades de elementos (por defecto 10^2 a 10^5)")
+    parser.add_argument('--layouts', nargs='+', choices=LAYOUTS, default=list(LAYOUTS), help="tipos de plano")
+    parser.add_argument('--repeat', type=int, default=5, help="repeticiones por medición (se reporta la mediana)")
+    parser.add_argument('--operations', type=int, default=200, help="clics, cuadros de arrastre y pasos de deshacer por repetición")
+    parser.add_argument('--output', help="archivo JSON de resultados (por defecto la salida estándar)")
+    parser.add_argument('--baseline', help="resultados anteriores con los que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="empeoramiento admitido antes de marcar una regresión (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+    results = []
+    for layout in args.layouts:
+        for count in args.sizes:
+            print(f"{layout} {count}...", file=sys.stderr); results.extend(run_case(count, layout, args.repeat, args.operations))
+    report = {'meta': {'python': platform.python_version(), 'numpy': np.__version__ if np is not None else None, 'platform': platform.platform(),
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S')}, 'results': results}
+    if args.baseline:
+        with open(args.baseline) as f: report['regressions'] = compare(results, json.load(f), args.tolerance)
+        for regression in report['regressions']:
+            print(f"REGRESIÓN {regression['case']} ({regression['layout']}, {regression['elements']}): {regression['metric']} "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} (x{regression['ratio']:.2f})", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f: json.dump(report, f, indent=2)
+    else: json.dump(report, sys.stdout, indent=2); sys.stdout.write("\n")
+    return 1 if report.get('regressions') else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
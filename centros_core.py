@@ -0,0 +1,732 @@
+# Implementado por Nelson Esteban Hernandez Soto durante el curso de Diseño Sísmico de Mampostería
+# e-mail: nhernandez@unal.edu.co
+# Universidad Nacional de Colombia - 2025
+
+"""
+Núcleo de cálculo de la Calculadora de Centro de Rigidez: modelo de columnas y muros, acumuladores de
+rigidez, modelo compacto, índice espacial e historial de cambios. No depende de Tkinter, por lo que se
+puede importar desde scripts y procesos de análisis por lotes.
+"""
+
+import math
+import json
+import struct
+import copy
+import os
+import sys
+from multiprocessing import Pool
+from collections import deque
+try: import numpy as np
+except ImportError: np = None
+
+# --- Constantes y Configuración ---
+UNDO_LIMIT = 5000  # pasos de deshacer; cada paso guarda solo el cambio, no el modelo
+COMPACT_MODEL_THRESHOLD = 5000  # a partir de aquí los modelos se cargan en ElementArrays (si hay NumPy)
+
+# --- Clases del Modelo de Datos ---
+class StructuralElement:
+    # Atributos en __slots__: sin __dict__ por elemento, también en las vistas ColumnView/WallView que heredan de aquí.
+    __slots__ = ('x', 'y')
+    def __init__(self, x, y): self.x, self.y = float(x), float(y)
+    def get_center(self): return self.x, self.y
+    def get_rigidity_x(self): raise NotImplementedError
+    def get_rigidity_y(self): raise NotImplementedError
+    def is_hit(self, model_x, model_y): raise NotImplementedError
+    def move(self, dx, dy): self.x, self.y = self.x + dx, self.y + dy
+class Column(StructuralElement):
+    __slots__ = ('id', 'width', 'height'); count = 0
+    def __init__(self, x, y, width, height):
+        super().__init__(x, y); Column.count += 1; self.id = Column.count
+        self.width, self.height = float(width), float(height)
+    def get_rigidity_x(self): return self.height * (self.width ** 3)
+    def get_rigidity_y(self): return self.width * (self.height ** 3)
+    def get_bounding_box(self):
+        half_w, half_h = self.width / 2, self.height / 2
+        return (self.x - half_w, self.y - half_h, self.x + half_w, self.y + half_h)
+    def is_hit(self, model_x, model_y):
+        x0, y0, x1, y1 = self.get_bounding_box(); return x0 <= model_x <= x1 and y0 <= model_y <= y1
+class Wall(StructuralElement):
+    __slots__ = ('id', 'length', 'thickness', 'orientation'); count = 0
+    def __init__(self, x, y, length, thickness, orientation):
+        super().__init__(x, y); Wall.count += 1; self.id = Wall.count
+        self.length, self.thickness, self.orientation = float(length), float(thickness), orientation
+    def get_rigidity_y(self): return self.thickness * (self.length ** 3) if self.orientation == 'V' else self.length * (self.thickness ** 3)
+    def get_rigidity_x(self): return self.thickness * (self.length ** 3) if self.orientation == 'H' else self.length * (self.thickness ** 3)
+    def get_bounding_box(self):
+        if self.orientation == 'V':
+            half_t, half_l = self.thickness / 2, self.length / 2
+            return (self.x - half_t, self.y - half_l, self.x + half_t, self.y + half_l)
+        else:
+            half_l, half_t = self.length / 2, self.thickness / 2
+            return (self.x - half_l, self.y - half_t, self.x + half_l, self.y + half_t)
+    def is_hit(self, model_x, model_y):
+        x0, y0, x1, y1 = self.get_bounding_box(); return x0 <= model_x <= x1 and y0 <= model_y <= y1
+
+class RigiditySums:
+    # Acumulador persistente de ΣKx, ΣKy, ΣKy·x y ΣKx·y; cada cambio aplica un delta O(1)
+    # y cada RESYNC_INTERVAL operaciones (o tantas como elementos, si son más) se recalcula exacto para acotar la
+    # deriva numérica; así el recálculo O(n) se reparte entre al menos n cambios, también en altas masivas.
+    RESYNC_INTERVAL = 1000
+    # version cambia con cada operación: permite invalidar cálculos derivados de la geometría (p. ej. LateralLoadEngine).
+    def __init__(self, elements=()): self.version = 0; self.resync(elements)
+    def resync(self, elements):
+        self.kx = self.ky = self.ky_x = self.kx_y = 0.0; self.count = 0; self.ops_since_resync = 0; self.version += 1
+        if isinstance(elements, ElementArrays): self.kx, self.ky, self.ky_x, self.kx_y = elements.rigidity_sums(); self.count = len(elements); return
+        for elem in elements: self._accumulate(elem, 1)
+        self.ops_since_resync = 0
+    def needs_resync(self): return self.ops_since_resync >= max(self.RESYNC_INTERVAL, self.count)
+    def _accumulate(self, elem, sign):
+        kx, ky = elem.get_rigidity_x(), elem.get_rigidity_y()
+        self.kx += sign * kx; self.ky += sign * ky; self.ky_x += sign * ky * elem.x; self.kx_y += sign * kx * elem.y
+        self.count += sign; self.ops_since_resync += 1; self.version += 1
+        if self.count == 0: self.kx = self.ky = self.ky_x = self.kx_y = 0.0
+    def set_sums(self, kx, ky, ky_x, kx_y, count):
+        # Carga sumas ya calculadas (p. ej. la cabecera de un archivo binario) sin recorrer los elementos.
+        self.kx, self.ky, self.ky_x, self.kx_y, self.count = kx, ky, ky_x, kx_y, count; self.ops_since_resync = 0; self.version += 1
+    def add(self, elem): self._accumulate(elem, 1)
+    def remove(self, elem): self._accumulate(elem, -1)
+    def move(self, elem, dx, dy):
+        self.ky_x += elem.get_rigidity_y() * dx; self.kx_y += elem.get_rigidity_x() * dy; self.ops_since_resync += 1; self.version += 1
+    def center(self):
+        if self.count == 0 or self.kx == 0 or self.ky == 0: return None
+        return self.ky_x / self.ky, self.kx_y / self.kx
+
+def element_to_dict(elem):
+    if isinstance(elem, Column): data = {'x': elem.x, 'y': elem.y, 'id': elem.id, 'width': elem.width, 'height': elem.height}
+    else: data = {'x': elem.x, 'y': elem.y, 'id': elem.id, 'length': elem.length, 'thickness': elem.thickness, 'orientation': elem.orientation}
+    data['type'] = 'column' if isinstance(elem, Column) else 'wall'; return data
+def model_bounds(elements):
+    if isinstance(elements, ElementArrays): return elements.bounds()
+    min_x = min_y = math.inf; max_x = max_y = -math.inf
+    for elem in elements:
+        x0, y0, x1, y1 = elem.get_bounding_box()
+        min_x, min_y, max_x, max_y = min(min_x, x0), min(min_y, y0), max(max_x, x1), max(max_y, y1)
+    return None if min_x == math.inf else (min_x, min_y, max_x, max_y)
+def aggregate_small_elements(elements, min_size, cell_size):
+    # Separa los elementos cuya caja mide menos de min_size en ambos ejes y los cuenta por celdas de cell_size
+    # (según su centro). Devuelve ({(i, j): cantidad}, demás elementos en orden de dibujo).
+    if isinstance(elements, ElementArrays):
+        rows = elements.rows(); kind, x, y, d1, d2, horizontal = (getattr(elements, name)[rows] for name in ('kind', 'x', 'y', 'd1', 'd2', 'horizontal'))
+        half_w, half_h = ElementArrays.half_extents_from(kind, d1, d2, horizontal); small = 2 * np.maximum(half_w, half_h) < min_size
+        keys, counts = np.unique(np.floor(np.column_stack([x[small], y[small]]) / cell_size).astype(np.int64), axis=0, return_counts=True)
+        return dict(zip(map(tuple, keys.tolist()), counts.tolist())), [elements.view(row) for row in rows[~small].tolist()]
+    cells, large = {}, []
+    for elem in elements:
+        x0, y0, x1, y1 = elem.get_bounding_box()
+        if max(x1 - x0, y1 - y0) < min_size: key = (math.floor(elem.x / cell_size), math.floor(elem.y / cell_size)); cells[key] = cells.get(key, 0) + 1
+        else: large.append(elem)
+    return cells, large
+
+# --- Modelo compacto (estructura de arreglos, requiere NumPy) ---
+class ElementArrays:
+    # Guarda todos los elementos en arreglos contiguos. Las filas nunca se reordenan: borrar solo marca
+    # alive=False, así las vistas (ColumnView/WallView) siguen siendo válidas y se pueden restaurar.
+    COLUMN, WALL = 0, 1
+    source = None  # ruta del .crm proyectado en memoria del que se leen los campos (from_records)
+    FIELDS = (('kind', 'i1'), ('x', 'f8'), ('y', 'f8'), ('d1', 'f8'), ('d2', 'f8'), ('horizontal', '?'), ('ident', 'i8'), ('alive', '?'))
+    def __init__(self, capacity=64):
+        if np is None: raise RuntimeError("El modelo compacto requiere NumPy.")
+        for name, dtype in self.FIELDS: setattr(self, name, np.zeros(capacity, dtype))
+        self.size = 0; self.live = 0
+    @classmethod
+    def from_elements(cls, elements):
+        store = cls(max(len(elements), 64))
+        for elem in elements: store.append(elem)
+        return store
+    @classmethod
+    def from_data(cls, elements_data):
+        # Equivalente a Column(**d)/Wall(**d) de load_configuration, sin crear un objeto por elemento.
+        store = cls(max(len(elements_data), 64))
+        for data in elements_data:
+            elem_type = data.get('type')
+            if elem_type == 'column':
+                Column.count += 1; store._append_row(cls.COLUMN, data['x'], data['y'], data['width'], data['height'], False, Column.count)
+            elif elem_type == 'wall':
+                Wall.count += 1; store._append_row(cls.WALL, data['x'], data['y'], data['length'], data['thickness'], data['orientation'] == 'H', Wall.count)
+        return store
+    def _append_row(self, kind, x, y, d1, d2, horizontal, ident):
+        if self.size == len(self.x):
+            capacity = max(2 * self.size, 64)
+            for name, dtype in self.FIELDS:
+                grown = np.zeros(capacity, dtype); grown[:self.size] = getattr(self, name)[:self.size]; setattr(self, name, grown)
+        row = self.size
+        self.kind[row], self.x[row], self.y[row], self.d1[row], self.d2[row] = kind, x, y, d1, d2
+        self.horizontal[row], self.ident[row], self.alive[row] = horizontal, ident, True
+        self.size += 1; self.live += 1; return row
+    def append(self, elem):
+        if isinstance(elem, Column): row = self._append_row(self.COLUMN, elem.x, elem.y, elem.width, elem.height, False, elem.id)
+        else: row = self._append_row(self.WALL, elem.x, elem.y, elem.length, elem.thickness, elem.orientation == 'H', elem.id)
+        return self.view(row)
+    def remove(self, view):
+        if view._store is not self or not self.alive[view._row]: raise ValueError("El elemento no pertenece al modelo.")
+        self.alive[view._row] = False; self.live -= 1
+    def restore(self, view): self.alive[view._row] = True; self.live += 1
+    def mapped_file(self): return self.source
+    def detach(self):
+        # Copia a memoria los campos proyectados desde un .crm para poder sobrescribir ese archivo.
+        for name, _ in self.FIELDS: setattr(self, name, np.array(getattr(self, name)))
+        self.source = None
+    def copy(self):
+        store = ElementArrays.__new__(ElementArrays)
+        for name, _ in self.FIELDS: setattr(store, name, np.array(getattr(self, name)[:self.size]))
+        store.size, store.live = self.size, self.live; return store
+    def view(self, row): return (WallView if self.kind[row] == self.WALL else ColumnView)(self, row)
+    def rows(self): return np.flatnonzero(self.alive[:self.size])
+    def __len__(self): return self.live
+    def __iter__(self): return (self.view(row) for row in self.rows())
+    def __reversed__(self): return (self.view(row) for row in self.rows()[::-1])
+    def to_elements(self):
+        elements = []
+        for view in self:
+            elem = Column.__new__(Column) if isinstance(view, Column) else Wall.__new__(Wall)
+            for key, value in element_to_dict(view).items():
+                if key != 'type': setattr(elem, key, value)
+            elements.append(elem)
+        return elements
+    def _live_arrays(self, *names):
+        mask = self.alive[:self.size]; return [getattr(self, name)[:self.size][mask] for name in names]
+    @classmethod
+    def from_records(cls, records):
+        # Usa directamente los campos de un arreglo de registros (p. ej. un np.memmap) sin copiarlos. Los campos se ven
+        # como ndarray: siguen proyectados, pero sin el __getitem__ en Python de np.memmap en cada acceso de una vista.
+        store = cls.__new__(cls); store.source = getattr(records, 'filename', None)
+        store.kind, store.x, store.y, store.d1, store.d2, store.horizontal, store.ident = (records[name].view(np.ndarray) for name in ('kind', 'x', 'y', 'd1', 'd2', 'horizontal', 'id'))
+        store.alive = np.ones(len(records), bool); store.size = store.live = len(records); return store
+    def to_records(self):
+        records = np.zeros(self.live, RECORD_DTYPE); mask = self.alive[:self.size]
+        for name, field in (('kind', 'kind'), ('x', 'x'), ('y', 'y'), ('d1', 'd1'), ('d2', 'd2'), ('horizontal', 'horizontal'), ('ident', 'id')):
+            records[field] = getattr(self, name)[:self.size][mask]
+        return records
+    @staticmethod
+    def rigidity_from(kind, d1, d2, horizontal):
+        # Columnas y muros horizontales: Kx = d2·d1³, Ky = d1·d2³; los muros verticales intercambian ambos.
+        a, b = d2 * d1 ** 3, d1 * d2 ** 3; swap = (kind == ElementArrays.WALL) & ~horizontal
+        return np.where(swap, b, a), np.where(swap, a, b)
+    def rigidity_arrays(self):
+        kind, d1, d2, horizontal = self._live_arrays('kind', 'd1', 'd2', 'horizontal'); return self.rigidity_from(kind, d1, d2, horizontal)
+    def rigidity_sums(self):
+        kx, ky = self.rigidity_arrays(); x, y = self._live_arrays('x', 'y')
+        return float(kx.sum()), float(ky.sum()), float(ky @ x), float(kx @ y)
+    def center_of_rigidity(self):
+        sum_kx, sum_ky, sum_ky_x, sum_kx_y = self.rigidity_sums()
+        if self.live == 0 or sum_kx == 0 or sum_ky == 0: return None
+        return sum_ky_x / sum_ky, sum_kx_y / sum_kx
+    def eccentricity(self, center_of_mass):
+        center = self.center_of_rigidity()
+        if center is None: return None
+        return center[0] - center_of_mass[0], center[1] - center_of_mass[1]
+    @staticmethod
+    def half_extents_from(kind, d1, d2, horizontal):
+        swap = (kind == ElementArrays.WALL) & ~horizontal; return np.where(swap, d2, d1) / 2, np.where(swap, d1, d2) / 2
+    def half_extents(self): return self.half_extents_from(*self._live_arrays('kind', 'd1', 'd2', 'horizontal'))
+    def boxes(self, rows):
+        # Cajas envolventes (x0, y0, x1, y1) de las filas dadas, como en get_bounding_box().
+        x, y = self.x[rows], self.y[rows]; half_w, half_h = self.half_extents_from(self.kind[rows], self.d1[rows], self.d2[rows], self.horizontal[rows])
+        return x - half_w, y - half_h, x + half_w, y + half_h
+    def bounds(self):
+        if self.live == 0: return None
+        (x, y), (half_w, half_h) = self._live_arrays('x', 'y'), self.half_extents()
+        return float((x - half_w).min()), float((y - half_h).min()), float((x + half_w).max()), float((y + half_h).max())
+
+def _array_field(name, cast=float):
+    return property(lambda self: cast(getattr(self._store, name)[self._row]), lambda self, value: getattr(self._store, name).__setitem__(self._row, value))
+class _ElementView:
+    # Vista ligera sobre una fila de ElementArrays que se comporta como Column/Wall.
+    __slots__ = ()
+    def __init__(self, store, row): self._store, self._row = store, row
+    def __eq__(self, other): return isinstance(other, _ElementView) and other._store is self._store and other._row == self._row
+    def __hash__(self): return hash((id(self._store), self._row))
+    x, y, id = _array_field('x'), _array_field('y'), _array_field('ident', int)
+    def move(self, dx, dy): self._store.x[self._row] += dx; self._store.y[self._row] += dy
+class ColumnView(_ElementView, Column):
+    __slots__ = ('_store', '_row')
+    width, height = _array_field('d1'), _array_field('d2')
+class WallView(_ElementView, Wall):
+    __slots__ = ('_store', '_row')
+    length, thickness = _array_field('d1'), _array_field('d2')
+    orientation = property(lambda self: 'H' if self._store.horizontal[self._row] else 'V', lambda self, value: self._store.horizontal.__setitem__(self._row, value == 'H'))
+
+# --- Índice espacial ---
+class SpatialIndex:
+    # Rejilla uniforme sobre las cajas envolventes. Cada elemento guarda su número de orden (seq), que
+    # reproduce el orden de self.elements: el mayor seq es el elemento dibujado encima. Sobre un ElementArrays las
+    # claves internas son las filas (enteros): las vistas solo se crean al devolver resultados.
+    CELL_SIZE = 2.0
+    def __init__(self, elements=(), cell_size=CELL_SIZE): self.cell_size = cell_size; self.rebuild(elements)
+    def rebuild(self, elements):
+        self.cells, self.entries, self.next_seq = {}, {}, 0
+        self.store = elements if isinstance(elements, ElementArrays) else None
+        if self.store is not None: self._rebuild_arrays(); return
+        for elem in elements: self.insert(elem)
+    def _rebuild_arrays(self):
+        # Igual que insert() fila por fila, con los rangos de celdas calculados con NumPy sobre las columnas del modelo.
+        rows = self.store.rows(); x0, y0, x1, y1 = self.store.boxes(rows); s = self.cell_size
+        ranges = np.floor(np.column_stack([x0 / s, y0 / s, x1 / s, y1 / s])).astype(np.int64).tolist(); entries, cells = self.entries, self.cells
+        for seq, (row, cell_range) in enumerate(zip(rows.tolist(), ranges)):
+            i0, j0, i1, j1 = cell_range; entries[row] = (seq, (i0, j0, i1, j1))
+            if i0 == i1 and j0 == j1: cells.setdefault((i0, j0), {})[row] = seq
+            else:
+                for key in self._keys(cell_range): cells.setdefault(key, {})[row] = seq
+        self.next_seq = len(rows)
+    def _key(self, elem): return elem if self.store is None else elem._row
+    def _element(self, key): return key if self.store is None else self.store.view(key)
+    def __len__(self): return len(self.entries)
+    def _cell_range(self, x0, y0, x1, y1):
+        s = self.cell_size; return math.floor(x0 / s), math.floor(y0 / s), math.floor(x1 / s), math.floor(y1 / s)
+    @staticmethod
+    def _keys(cell_range):
+        i0, j0, i1, j1 = cell_range; return ((i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1))
+    def insert(self, elem, seq=None):
+        if seq is None: seq = self.next_seq
+        self.next_seq = max(self.next_seq, seq + 1); key = self._key(elem)
+        cell_range = self._cell_range(*elem.get_bounding_box()); self.entries[key] = (seq, cell_range)
+        for cell in self._keys(cell_range): self.cells.setdefault(cell, {})[key] = seq
+    def remove(self, elem):
+        key = self._key(elem); seq, cell_range = self.entries.pop(key)
+        for cell in self._keys(cell_range):
+            bucket = self.cells[cell]; del bucket[key]
+            if not bucket: del self.cells[cell]
+        return seq
+    def update(self, elem):
+        seq, cell_range = self.entries[self._key(elem)]
+        if self._cell_range(*elem.get_bounding_box()) != cell_range: self.remove(elem); self.insert(elem, seq)
+    def hit(self, model_x, model_y):
+        # Devuelve el elemento de más arriba bajo el punto, igual que recorrer reversed(self.elements).
+        s = self.cell_size; bucket = self.cells.get((math.floor(model_x / s), math.floor(model_y / s)), {})
+        hits = [(seq, elem) for elem, seq in ((self._element(key), seq) for key, seq in bucket.items()) if elem.is_hit(model_x, model_y)]
+        return max(hits, key=lambda hit: hit[0])[1] if hits else None
+    def query(self, x0, y0, x1, y1):
+        # Elementos cuya caja toca el rectángulo, en orden de dibujo.
+        i0, j0, i1, j1 = cell_range = self._cell_range(x0, y0, x1, y1); found = {}
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            buckets = (bucket for (i, j), bucket in self.cells.items() if i0 <= i <= i1 and j0 <= j <= j1)
+        else: buckets = (self.cells[key] for key in self._keys(cell_range) if key in self.cells)
+        for bucket in buckets: found.update(bucket)
+        if self.store is not None:
+            rows, seqs = np.fromiter(found.keys(), np.int64, len(found)), np.fromiter(found.values(), np.int64, len(found))
+            bx0, by0, bx1, by1 = self.store.boxes(rows); inside = (bx0 <= x1) & (bx1 >= x0) & (by0 <= y1) & (by1 >= y0)
+            rows, seqs = rows[inside], seqs[inside]; return [self.store.view(row) for row in rows[np.argsort(seqs, kind='stable')].tolist()]
+        visible = []
+        for elem, seq in found.items():
+            bx0, by0, bx1, by1 = elem.get_bounding_box()
+            if bx0 <= x1 and bx1 >= x0 and by0 <= y1 and by1 >= y0: visible.append((seq, elem))
+        visible.sort(key=lambda item: item[0]); return [elem for _, elem in visible]
+
+# --- Historial de deshacer/rehacer ---
+class UndoHistory:
+    # Historial por comandos: cada entrada guarda solo el elemento afectado y los campos que cambiaron
+    # ('move', 'edit', 'add', 'delete', 'cm' o 'batch'), no una copia del modelo.
+    def __init__(self, limit=UNDO_LIMIT):
+        # undo_sizes/redo_sizes guardan el tamaño de cada entrada en paralelo a las pilas: memory_size() no las recorre.
+        self.undo_stack, self.redo_stack = deque(maxlen=limit), []; self.undo_sizes, self.redo_sizes = deque(maxlen=limit), []
+        self.undo_bytes = self.redo_bytes = 0; self.last_merge_key = None
+    def clear(self):
+        self.undo_stack.clear(); self.redo_stack.clear(); self.undo_sizes.clear(); self.redo_sizes.clear()
+        self.undo_bytes = self.redo_bytes = 0; self.last_merge_key = None
+    def push(self, entry, merge_key=None):
+        # Entradas consecutivas con la misma merge_key (p. ej. empujes con flechas del mismo elemento) se fusionan.
+        self.redo_stack.clear(); self.redo_sizes.clear(); self.redo_bytes = 0
+        if merge_key is not None and merge_key == self.last_merge_key and self.undo_stack:
+            last = self.undo_stack[-1]; last['dx'] += entry['dx']; last['dy'] += entry['dy']; return
+        if len(self.undo_sizes) == self.undo_sizes.maxlen: self.undo_bytes -= self.undo_sizes[0]
+        size = self.entry_size(entry); self.undo_stack.append(entry); self.undo_sizes.append(size); self.undo_bytes += size; self.last_merge_key = merge_key
+    def pop_undo(self):
+        if not self.undo_stack: return None
+        entry, size = self.undo_stack.pop(), self.undo_sizes.pop(); self.undo_bytes -= size
+        self.redo_stack.append(entry); self.redo_sizes.append(size); self.redo_bytes += size; self.last_merge_key = None; return entry
+    def pop_redo(self):
+        if not self.redo_stack: return None
+        entry, size = self.redo_stack.pop(), self.redo_sizes.pop(); self.redo_bytes -= size
+        self.undo_stack.append(entry); self.undo_sizes.append(size); self.undo_bytes += size; self.last_merge_key = None; return entry
+    @staticmethod
+    def entry_size(entry):
+        # Memoria aproximada (bytes) de una entrada, sin contar los elementos a los que apunta.
+        size = sys.getsizeof(entry)
+        for key, value in entry.items():
+            if key == 'entries': size += sys.getsizeof(value) + sum(UndoHistory.entry_size(sub_entry) for sub_entry in value)
+            elif key != 'element': size += sys.getsizeof(value)
+        return size
+    def memory_size(self): return self.undo_bytes + self.redo_bytes
+    def remap(self, replace):
+        # Sustituye en todas las entradas los elementos para los que replace(elem) devuelve otro objeto.
+        def remap_entry(entry):
+            if 'element' in entry: entry['element'] = replace(entry['element'])
+            for sub_entry in entry.get('entries', ()): remap_entry(sub_entry)
+        for entry in list(self.undo_stack) + self.redo_stack: remap_entry(entry)
+        self.last_merge_key = None
+
+# --- Carga y análisis sin interfaz ---
+def elements_from_data(elements_data, compact=None):
+    # Construye los elementos del esquema JSON {"type": "column"|"wall", ...}; los ids se renumeran como en
+    # Column(**d)/Wall(**d). Con compact=None se usa ElementArrays para modelos grandes si hay NumPy.
+    if compact is None: compact = np is not None and len(elements_data) >= COMPACT_MODEL_THRESHOLD
+    if compact: return ElementArrays.from_data(elements_data)
+    elements = []
+    for elem_data in elements_data:
+        elem_data = dict(elem_data); elem_type = elem_data.pop('type', None); elem_data.pop('id', None)
+        if elem_type == 'column': elements.append(Column(**elem_data))
+        elif elem_type == 'wall': elements.append(Wall(**elem_data))
+    return elements
+def load_model(filepath, compact=None):
+    if filepath.lower().endswith(BINARY_MODEL_EXTENSION): return load_binary_model(filepath)
+    with open(filepath, 'r') as f: data = json.load(f)
+    return elements_from_data(data.get("elements", []), compact), tuple(data.get("center_of_mass", [0.0, 0.0]))
+def analyze(elements, center_of_mass):
+    sums = RigiditySums(elements); center = sums.center()
+    result = {'elements': sums.count, 'sum_kx': sums.kx, 'sum_ky': sums.ky, 'sum_ky_x': sums.ky_x, 'sum_kx_y': sums.kx_y,
+              'cm_x': center_of_mass[0], 'cm_y': center_of_mass[1], 'cr_x': None, 'cr_y': None, 'ex': None, 'ey': None}
+    if center is not None:
+        result.update(cr_x=center[0], cr_y=center[1], ex=center[0] - center_of_mass[0], ey=center[1] - center_of_mass[1])
+    return result
+
+# --- Formato binario de modelo ---
+# Cabecera de 128 bytes seguida de registros de ancho fijo (48 bytes) legibles con np.memmap. La cabecera guarda
+# las sumas de rigidez y los límites, de modo que el CR se conoce sin leer los registros.
+BINARY_MODEL_EXTENSION = ".crm"
+BINARY_MAGIC, BINARY_VERSION = b"CRMB", 1
+_BINARY_HEADER = struct.Struct('<4sHHQqq2d4d4d16x')
+RECORD_DTYPE = np.dtype([('kind', 'i1'), ('horizontal', '?'), ('_pad', 'V6'), ('id', '<i8'), ('x', '<f8'), ('y', '<f8'), ('d1', '<f8'), ('d2', '<f8')]) if np is not None else None
+def records_from_data(elements_data):
+    # Registros a partir del esquema JSON, conservando los ids (conversión sin pérdidas).
+    if np is None: raise RuntimeError("El formato binario requiere NumPy.")
+    records = np.zeros(len(elements_data), RECORD_DTYPE); next_ids = {'column': 0, 'wall': 0}
+    for row, data in enumerate(elements_data):
+        elem_type = data['type']; ident = data.get('id') or next_ids[elem_type] + 1; next_ids[elem_type] = max(next_ids[elem_type], ident)
+        if elem_type == 'column': records[row] = (ElementArrays.COLUMN, False, b'', ident, data['x'], data['y'], data['width'], data['height'])
+        else: records[row] = (ElementArrays.WALL, data['orientation'] == 'H', b'', ident, data['x'], data['y'], data['length'], data['thickness'])
+    return records
+def records_to_data(records):
+    elements_data = []
+    for kind, horizontal, ident, x, y, d1, d2 in zip(*(records[name].tolist() for name in ('kind', 'horizontal', 'id', 'x', 'y', 'd1', 'd2'))):
+        if kind == ElementArrays.COLUMN: elements_data.append({'x': x, 'y': y, 'id': ident, 'width': d1, 'height': d2, 'type': 'column'})
+        else: elements_data.append({'x': x, 'y': y, 'id': ident, 'length': d1, 'thickness': d2, 'orientation': 'H' if horizontal else 'V', 'type': 'wall'})
+    return elements_data
+def write_binary_model(filepath, records, center_of_mass):
+    kind, x, y, d1, d2, horizontal = (records[name] for name in ('kind', 'x', 'y', 'd1', 'd2', 'horizontal'))
+    kx, ky = ElementArrays.rigidity_from(kind, d1, d2, horizontal); half_w, half_h = ElementArrays.half_extents_from(kind, d1, d2, horizontal)
+    bounds = ((x - half_w).min(), (y - half_h).min(), (x + half_w).max(), (y + half_h).max()) if len(records) else (math.nan,) * 4
+    column_ids, wall_ids = records['id'][kind == ElementArrays.COLUMN], records['id'][kind == ElementArrays.WALL]
+    header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, RECORD_DTYPE.itemsize, len(records), int(column_ids.max(initial=0)), int(wall_ids.max(initial=0)),
+                                 *center_of_mass, kx.sum(), ky.sum(), ky @ x, kx @ y, *bounds)
+    # Se escribe en un temporal y se reemplaza el original: nunca se trunca un archivo que puede estar proyectado en memoria.
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f: f.write(header); f.write(records.tobytes())
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path): os.remove(temp_path)
+        raise
+def save_binary_model(filepath, elements, center_of_mass):
+    # Guardar sobre el .crm abierto: el modelo deja de depender de la proyección antes de reemplazar el archivo.
+    if isinstance(elements, ElementArrays) and elements.mapped_file() and os.path.exists(filepath) and os.path.samefile(elements.mapped_file(), filepath): elements.detach()
+    records = elements.to_records() if isinstance(elements, ElementArrays) else records_from_data([element_to_dict(elem) for elem in elements])
+    write_binary_model(filepath, records, center_of_mass)
+def read_binary_header(filepath):
+    with open(filepath, 'rb') as f: raw = f.read(_BINARY_HEADER.size)
+    if len(raw) < _BINARY_HEADER.size: raise ValueError("Archivo binario incompleto.")
+    magic, version, record_size, count, column_count, wall_count, *values = _BINARY_HEADER.unpack(raw)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION: raise ValueError("No es un modelo binario compatible.")
+    if np is not None and record_size != RECORD_DTYPE.itemsize: raise ValueError("Tamaño de registro no soportado.")
+    return {'count': count, 'column_count': column_count, 'wall_count': wall_count, 'center_of_mass': tuple(values[0:2]),
+            'sums': tuple(values[2:6]), 'bounds': None if count == 0 else tuple(values[6:10])}
+def open_binary_records(filepath, header=None):
+    # Proyección en memoria copy-on-write: no se lee nada del disco hasta que se accede a los registros.
+    header = header or read_binary_header(filepath)
+    if header['count'] == 0: return np.zeros(0, RECORD_DTYPE)
+    return np.memmap(filepath, RECORD_DTYPE, mode='c', offset=_BINARY_HEADER.size, shape=(header['count'],))
+def load_binary_model(filepath, header=None):
+    if np is None: raise RuntimeError("El formato binario requiere NumPy.")
+    header = header or read_binary_header(filepath)
+    Column.count, Wall.count = max(Column.count, header['column_count']), max(Wall.count, header['wall_count'])
+    return ElementArrays.from_records(open_binary_records(filepath, header)), header['center_of_mass']
+def json_to_binary(json_path, binary_path):
+    # Acepta los dos esquemas JSON; un edificio de varios pisos no cabe en un .crm y se rechaza en lugar de perder pisos.
+    with open(json_path, 'r') as f: data = json.load(f)
+    storeys = data.get("storeys") or [data]
+    if len(storeys) > 1: raise ValueError(f"El formato {BINARY_MODEL_EXTENSION} guarda un solo piso y el archivo tiene {len(storeys)}; use .json para edificios.")
+    write_binary_model(binary_path, records_from_data(storeys[0].get("elements", [])), tuple(storeys[0].get("center_of_mass", [0.0, 0.0])))
+def binary_to_json(binary_path, json_path):
+    header = read_binary_header(binary_path); records = open_binary_records(binary_path, header)
+    with open(json_path, 'w') as f: json.dump({"center_of_mass": header['center_of_mass'], "elements": records_to_data(records)}, f, indent=4)
+
+# --- Edificio de varios pisos ---
+class Storey:
+    # Un piso con sus elementos, su CM y sus cachés (sumas de rigidez, índice espacial, historial). Los pisos copiados
+    # comparten los elementos sin duplicarlos; shared guarda lo que aún es compartido (id() del elemento o del
+    # ElementArrays) y own() hace la copia privada justo antes de la primera modificación.
+    def __init__(self, name, elements=None, center_of_mass=(0.0, 0.0), rigidity=None):
+        self.name, self.elements, self.center_of_mass = name, elements if elements is not None else [], tuple(center_of_mass)
+        self.dirty = rigidity is None; self.rigidity = rigidity or RigiditySums()
+        self.spatial_index, self.history, self.shared = None, UndoHistory(), set(); self.lateral, self.lateral_version = None, None
+        self.known_bounds = None  # (versión de las sumas de rigidez, límites)
+    def needs_recompute(self): return self.dirty or self.rigidity.ops_since_resync > 0
+    def recompute(self): self.rigidity.resync(self.elements); self.dirty = False
+    def center_of_rigidity(self): return self.rigidity.center()
+    def bounds(self):
+        # Límites del piso en caché mientras no cambie la geometría; un .crm los trae en la cabecera.
+        if self.known_bounds is None or self.known_bounds[0] != self.rigidity.version: self.known_bounds = (self.rigidity.version, model_bounds(self.elements))
+        return self.known_bounds[1]
+    def lateral_engine(self):
+        # Coeficientes de cortante en caché hasta que cambie la geometría (la versión de las sumas de rigidez).
+        if self.lateral is None or self.lateral_version != self.rigidity.version:
+            self.lateral, self.lateral_version = LateralLoadEngine(self.elements), self.rigidity.version
+        return self.lateral
+    def eccentricity(self):
+        center = self.center_of_rigidity()
+        return None if center is None else (center[0] - self.center_of_mass[0], center[1] - self.center_of_mass[1])
+    def copy(self, name):
+        if isinstance(self.elements, ElementArrays): elements = self.elements; keys = {id(elements)}
+        else: elements = list(self.elements); keys = {id(elem) for elem in elements}
+        self.shared |= keys; clone = Storey(name, elements, self.center_of_mass, copy.copy(self.rigidity))
+        clone.dirty = self.dirty; clone.shared = set(keys); return clone
+    def own(self, elem=None):
+        # Devuelve la versión privada de elem (o solo privatiza el ElementArrays si elem es None).
+        if isinstance(self.elements, ElementArrays):
+            old = self.elements
+            if id(old) in self.shared:
+                self.shared.discard(id(old)); self.elements = old.copy()
+                self.history.remap(lambda e: self.elements.view(e._row) if getattr(e, '_store', None) is old else e)
+            return None if elem is None else self.elements.view(elem._row)
+        if elem is None or id(elem) not in self.shared: return elem
+        clone = copy.copy(elem); self.elements[self.elements.index(elem)] = clone; self.shared.discard(id(elem))
+        self.history.remap(lambda e: clone if e is elem else e); return clone
+    def to_data(self): return {"name": self.name, "center_of_mass": self.center_of_mass, "elements": [element_to_dict(elem) for elem in self.elements]}
+
+class Building:
+    def __init__(self, storeys=None): self.storeys = storeys or [Storey("Piso 1")]
+    def add_storey(self, name=None):
+        storey = Storey(name or f"Piso {len(self.storeys) + 1}"); storey.dirty = False; self.storeys.append(storey); return storey
+    def copy_storey(self, storey, name=None):
+        clone = storey.copy(name or f"{storey.name} (copia)"); self.storeys.insert(self.storeys.index(storey) + 1, clone); return clone
+    def recompute(self):
+        # Recalcula solo los pisos sucios, en el proceso actual: enviar los pisos a otros procesos cuesta más que sumarlos.
+        dirty = [storey for storey in self.storeys if storey.needs_recompute()]
+        for storey in dirty: storey.recompute()
+        return dirty
+    def to_data(self):
+        if len(self.storeys) == 1: data = self.storeys[0].to_data(); del data["name"]; return data
+        return {"storeys": [storey.to_data() for storey in self.storeys]}
+    @classmethod
+    def from_data(cls, data, compact=None):
+        # Acepta el esquema de un piso {"center_of_mass", "elements"} y el de varios {"storeys": [...]}.
+        storeys_data = data.get("storeys") or [dict(data, name="Piso 1")]
+        return cls([Storey(storey_data.get("name") or f"Piso {number}", elements_from_data(storey_data.get("elements", []), compact),
+                           storey_data.get("center_of_mass", [0.0, 0.0])) for number, storey_data in enumerate(storeys_data, 1)])
+def load_building(filepath, compact=None):
+    if filepath.lower().endswith(BINARY_MODEL_EXTENSION):
+        header = read_binary_header(filepath); elements, center_of_mass = load_binary_model(filepath, header)
+        rigidity = RigiditySums(); rigidity.set_sums(*header['sums'], header['count']); storey = Storey("Piso 1", elements, center_of_mass, rigidity)
+        storey.known_bounds = (rigidity.version, header['bounds']); return Building([storey])
+    with open(filepath, 'r') as f: return Building.from_data(json.load(f), compact)
+
+# --- Optimización de la distribución de muros y columnas ---
+# Busca valores de x, y o dimensiones de algunos elementos que minimicen w_x·|ex| + w_y·|ey|. Los candidatos se
+# evalúan por lotes con NumPy: las sumas de los elementos fijos se calculan una sola vez y cada lote solo suma los
+# elementos móviles. La búsqueda combina una rejilla, muestreo aleatorio (repartidos entre procesos) y un refinamiento
+# local alrededor de los mejores candidatos.
+OPTIMIZER_BATCH_SIZE = 8192  # candidatos por evaluación vectorizada
+PARALLEL_OPTIMIZE_THRESHOLD = 200000  # candidatos a partir de los cuales la búsqueda se reparte entre procesos
+OPTIMIZABLE_ATTRIBUTES = {Column: ('x', 'y', 'width', 'height'), Wall: ('x', 'y', 'length', 'thickness')}
+
+def _snap(values, low, high, step):
+    if step: values = low + np.round((values - low) / step) * step
+    return np.clip(values, low, high)
+
+class DesignVariable:
+    # Un atributo de un elemento que el optimizador puede cambiar entre low y high, en múltiplos de step si step > 0.
+    def __init__(self, element, attribute, low, high, step=0.0):
+        if attribute not in OPTIMIZABLE_ATTRIBUTES[Wall if isinstance(element, Wall) else Column]: raise ValueError(f"Atributo no optimizable: {attribute}")
+        if high < low or step < 0: raise ValueError("Se requiere mínimo <= máximo y paso >= 0.")
+        if attribute not in ('x', 'y') and low <= 0: raise ValueError("Las dimensiones deben ser positivas.")
+        self.element, self.attribute, self.low, self.high, self.step = element, attribute, float(low), float(high), float(step)
+    def levels(self, count):
+        # Valores de la rejilla: todos los pasos si caben en count, si no count valores repartidos en el intervalo.
+        if self.step and (self.high - self.low) / self.step + 1 <= count: return np.arange(self.low, self.high + self.step / 2, self.step)
+        return self.snap(np.linspace(self.low, self.high, max(count, 1 if self.high == self.low else 2)))
+    def snap(self, values): return _snap(values, self.low, self.high, self.step)
+
+class LayoutProblem:
+    # Forma vectorizada del cálculo del CR para un conjunto de variables de diseño (se envía tal cual a los procesos).
+    FIELD_OF = {'x': 'x', 'y': 'y', 'width': 'd1', 'height': 'd2', 'length': 'd1', 'thickness': 'd2'}
+    def __init__(self, elements, center_of_mass, variables, weights=(1.0, 1.0), sums=None):
+        if np is None: raise RuntimeError("El optimizador requiere NumPy.")
+        if not variables: raise ValueError("No hay variables de diseño.")
+        sums = sums or RigiditySums(elements); movable = list(dict.fromkeys(var.element for var in variables))
+        self.fixed = np.array([sums.kx, sums.ky, sums.ky_x, sums.kx_y])
+        for elem in movable:
+            kx, ky = elem.get_rigidity_x(), elem.get_rigidity_y(); self.fixed -= (kx, ky, ky * elem.x, kx * elem.y)
+        self.base = {'x': np.array([elem.x for elem in movable], float), 'y': np.array([elem.y for elem in movable], float),
+                     'd1': np.array([elem.length if isinstance(elem, Wall) else elem.width for elem in movable], float),
+                     'd2': np.array([elem.thickness if isinstance(elem, Wall) else elem.height for elem in movable], float)}
+        self.kind = np.array([ElementArrays.WALL if isinstance(elem, Wall) else ElementArrays.COLUMN for elem in movable], np.int8)
+        self.horizontal = np.array([isinstance(elem, Wall) and elem.orientation == 'H' for elem in movable])
+        self.columns = [(self.FIELD_OF[var.attribute], movable.index(var.element)) for var in variables]
+        self.center_of_mass, self.weights = np.array(center_of_mass, float), np.array(weights, float)
+    def evaluate(self, candidates):
+        # candidates: matriz (N, variables). Devuelve (objetivo, ex, ey) por candidato; inf si el CR no existe.
+        fields = {name: np.repeat(values[None, :], len(candidates), axis=0) for name, values in self.base.items()}
+        for j, (name, slot) in enumerate(self.columns): fields[name][:, slot] = candidates[:, j]
+        kx, ky = ElementArrays.rigidity_from(self.kind, fields['d1'], fields['d2'], self.horizontal)
+        sum_kx, sum_ky = self.fixed[0] + kx.sum(axis=1), self.fixed[1] + ky.sum(axis=1)
+        sum_ky_x, sum_kx_y = self.fixed[2] + (ky * fields['x']).sum(axis=1), self.fixed[3] + (kx * fields['y']).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ex, ey = sum_ky_x / sum_ky - self.center_of_mass[0], sum_kx_y / sum_kx - self.center_of_mass[1]
+        objective = self.weights[0] * np.abs(ex) + self.weights[1] * np.abs(ey)
+        return np.where((sum_kx > 0) & (sum_ky > 0), objective, np.inf), ex, ey
+
+def _best_of(problem, candidates, keep):
+    objective = problem.evaluate(candidates)[0]; best = np.argsort(objective)[:keep]; return objective[best], candidates[best]
+
+def _optimize_task(args):
+    # Tarea de un proceso: un tramo de la rejilla (índices start..stop) o count candidatos aleatorios con semilla seed.
+    # bounds lleva (low, high, step) de cada variable: las DesignVariable no se envían porque arrastran su elemento.
+    problem, bounds, levels, task, keep = args; kind, a, b = task; best_values, best_candidates = [], []
+    if kind == 'random': rng = np.random.default_rng(a)
+    for start in range(0 if kind == 'random' else a, b, OPTIMIZER_BATCH_SIZE):
+        stop = min(start + OPTIMIZER_BATCH_SIZE, b)
+        if kind == 'grid': candidates = np.column_stack([level[digits] for level, digits in zip(levels, np.unravel_index(np.arange(start, stop), [len(level) for level in levels]))])
+        else: candidates = np.column_stack([_snap(low + rng.random(stop - start) * (high - low), low, high, step) for low, high, step in bounds])
+        values, chosen = _best_of(problem, candidates, keep); best_values.append(values); best_candidates.append(chosen)
+    values, candidates = np.concatenate(best_values), np.concatenate(best_candidates); order = np.argsort(values)[:keep]
+    return values[order], candidates[order], (b - a) if kind == 'grid' else b
+
+def _collect(results, cancel):
+    # Recoge los resultados de las tareas; None si cancel (threading.Event) se activa entre dos tareas.
+    collected = []
+    for result in results:
+        if cancel is not None and cancel.is_set(): return None
+        collected.append(result)
+    return collected
+
+def _refine(problem, variables, candidate, value, rng, max_iterations=200, samples=64):
+    # Búsqueda por patrones: prueba ±delta en cada variable y perturbaciones aleatorias; si nada mejora, reduce delta.
+    low, high = np.array([var.low for var in variables]), np.array([var.high for var in variables])
+    floor = np.array([var.step or (var.high - var.low) * 1e-6 for var in variables]); delta = np.maximum((high - low) / 8, floor)
+    evaluated = 0
+    for _ in range(max_iterations):
+        steps = np.vstack([np.diag(delta), -np.diag(delta), (rng.random((samples, len(variables))) * 2 - 1) * delta])
+        neighbours = np.column_stack([var.snap(column) for var, column in zip(variables, (candidate + steps).T)])
+        values = problem.evaluate(neighbours)[0]; evaluated += len(neighbours); best = int(np.argmin(values))
+        if values[best] < value: candidate, value = neighbours[best], values[best]
+        elif np.all(delta <= floor): break
+        else: delta = np.maximum(delta / 2, floor)
+    return candidate, value, evaluated
+
+def optimize_layout(elements, center_of_mass, variables, weights=(1.0, 1.0), samples=1000000, workers=None, seed=None, sums=None, cancel=None):
+    # Devuelve el mejor candidato como {'values', 'changes', 'objective', 'ex', 'ey', 'evaluated'}; changes agrupa los
+    # valores nuevos por elemento ({elemento: {atributo: valor}}) para aplicarlos como un solo paso de deshacer.
+    # Devuelve None si cancel (threading.Event) se activa durante la búsqueda.
+    problem = LayoutProblem(elements, center_of_mass, variables, weights, sums); rng = np.random.default_rng(seed)
+    # Mitad del presupuesto para la rejilla (con tantos niveles por variable como quepan) y el resto aleatorio. Si ni
+    # siquiera dos niveles por variable caben (2^n > samples/2, p. ej. con muchas variables) no hay rejilla.
+    count = int((samples / 2) ** (1 / len(variables)))
+    levels = [var.levels(count) for var in variables] if count >= 2 else []
+    grid_size = math.prod(len(level) for level in levels) if levels else 0; random_size = max(samples - grid_size, 0)
+    chunk = max(OPTIMIZER_BATCH_SIZE, samples // (4 * (workers or os.cpu_count() or 1)))
+    tasks = [('grid', start, min(start + chunk, grid_size)) for start in range(0, grid_size, chunk)]
+    tasks += [('random', int(rng.integers(2 ** 63)), min(chunk, random_size - done)) for done in range(0, random_size, chunk)]
+    bounds = tuple((var.low, var.high, var.step) for var in variables); keep = 8; payloads = [(problem, bounds, levels, task, keep) for task in tasks]
+    if grid_size + random_size >= PARALLEL_OPTIMIZE_THRESHOLD and len(tasks) > 1 and workers != 1:
+        with Pool(min(workers or os.cpu_count() or 1, len(tasks))) as pool: results = _collect(pool.imap(_optimize_task, payloads), cancel)
+    else: results = _collect(map(_optimize_task, payloads), cancel)
+    if results is None: return None
+    values = np.concatenate([result[0] for result in results]); candidates = np.concatenate([result[1] for result in results])
+    evaluated = sum(result[2] for result in results); best_value, best_candidate = np.inf, None
+    for index in np.argsort(values)[:keep]:
+        if not np.isfinite(values[index]): break
+        if cancel is not None and cancel.is_set(): return None
+        candidate, value, count = _refine(problem, variables, candidates[index], values[index], rng); evaluated += count
+        if value < best_value: best_value, best_candidate = value, candidate
+    if best_candidate is None: raise ValueError("Ningún candidato tiene centro de rigidez definido.")
+    objective, ex, ey = (float(result[0]) for result in problem.evaluate(best_candidate[None, :]))
+    changes = {}
+    for var, value in zip(variables, best_candidate.tolist()): changes.setdefault(var.element, {})[var.attribute] = value
+    return {'values': best_candidate.tolist(), 'changes': changes, 'objective': objective, 'ex': ex, 'ey': ey, 'evaluated': evaluated}
+
+# --- Distribución de fuerzas laterales y excentricidad accidental ---
+# Método de piso rígido: una fuerza (Vx, Vy) aplicada en el CM desplazado produce un momento Mz respecto al CR, y cada
+# elemento toma Fx_i = Vx·Kx_i/ΣKx − Mz·Kx_i·ȳ_i/J y Fy_i = Vy·Ky_i/ΣKy + Mz·Ky_i·x̄_i/J, con (x̄, ȳ) medidos desde el CR y
+# J = Σ(Kx·ȳ² + Ky·x̄²). Los coeficientes no dependen de la carga, así que N casos × M elementos son un producto de matrices.
+ACCIDENTAL_ECCENTRICITY = 0.05  # fracción de la dimensión en planta perpendicular a la fuerza
+LATERAL_CHUNK_SIZE = 8192  # elementos por bloque al buscar los casos que gobiernan (acota la memoria N×M y cabe en caché)
+
+class LoadCase:
+    # Fuerza (vx, vy) aplicada en el punto (cm_x, cm_y), que ya incluye la excentricidad accidental.
+    def __init__(self, name, vx, vy, cm_x, cm_y): self.name, self.vx, self.vy, self.cm_x, self.cm_y = name, float(vx), float(vy), float(cm_x), float(cm_y)
+    def __repr__(self): return f"LoadCase({self.name!r}, vx={self.vx:g}, vy={self.vy:g}, cm=({self.cm_x:g}, {self.cm_y:g}))"
+
+def _hull_cases(points):
+    # Índices de los casos que pueden gobernar: max_c |a_c·d + m_c·t| se alcanza en un vértice de la envolvente convexa
+    # de {±(a_c, m_c)}, así que los demás casos se descartan antes del producto N×M (cadena monótona de Andrew).
+    signed = sorted({(float(sign * a), float(sign * m), index) for index, (a, m) in enumerate(points) for sign in (1, -1)})
+    def cross(o, a, b): return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+    hull = []
+    for sequence in (signed, signed[::-1]):
+        chain = []
+        for point in sequence:
+            while len(chain) >= 2 and cross(chain[-2], chain[-1], point) <= 0: chain.pop()
+            chain.append(point)
+        hull.extend(chain[:-1])
+    return sorted({index for _, _, index in hull}) or list(range(len(points)))
+
+def standard_load_cases(base_shear, center_of_mass, bounds, levels=(1.0,), centers_of_mass=(), ratio=ACCIDENTAL_ECCENTRICITY):
+    # Para cada nivel de fuerza y cada CM (el del piso y los alternativos): fuerza en X con el CM desplazado ±ratio·B_y y
+    # fuerza en Y con el CM desplazado ±ratio·B_x. base_shear es un número o un par (Vx, Vy).
+    vx, vy = base_shear if isinstance(base_shear, (tuple, list)) else (base_shear, base_shear)
+    width, height = bounds[2] - bounds[0], bounds[3] - bounds[1]; cases = []
+    for level in levels:
+        for number, (cm_x, cm_y) in enumerate([tuple(center_of_mass)] + [tuple(cm) for cm in centers_of_mass]):
+            label = f"{level:g}V" + (f" CM{number}" if number else "")
+            for sign, tag in ((1, '+'), (-1, '-')):
+                cases.append(LoadCase(f"X {label} e{tag}", level * vx, 0.0, cm_x, cm_y + sign * ratio * height))
+                cases.append(LoadCase(f"Y {label} e{tag}", 0.0, level * vy, cm_x + sign * ratio * width, cm_y))
+    return cases
+
+class LateralLoadEngine:
+    # Precalcula los coeficientes de cortante directo y torsional de cada elemento a partir de Kx/Ky.
+    def __init__(self, elements):
+        if np is None: raise RuntimeError("El análisis de casos de carga requiere NumPy.")
+        if isinstance(elements, ElementArrays):
+            self.ids, self.kinds, self.x, self.y = elements._live_arrays('ident', 'kind', 'x', 'y'); self.kx, self.ky = elements.rigidity_arrays()
+        else:
+            self.ids = np.array([elem.id for elem in elements], np.int64); self.kinds = np.array([ElementArrays.WALL if isinstance(elem, Wall) else ElementArrays.COLUMN for elem in elements], np.int8)
+            self.x, self.y = np.array([elem.x for elem in elements], float), np.array([elem.y for elem in elements], float)
+            self.kx, self.ky = np.array([elem.get_rigidity_x() for elem in elements], float), np.array([elem.get_rigidity_y() for elem in elements], float)
+        sum_kx, sum_ky = self.kx.sum(), self.ky.sum()
+        if len(self.ids) == 0 or sum_kx == 0 or sum_ky == 0: raise ValueError("El piso no tiene rigidez en ambas direcciones.")
+        self.center_of_rigidity = (float(self.ky @ self.x / sum_ky), float(self.kx @ self.y / sum_kx))
+        dx, dy = self.x - self.center_of_rigidity[0], self.y - self.center_of_rigidity[1]
+        self.polar_stiffness = float(self.kx @ dy ** 2 + self.ky @ dx ** 2)
+        if self.polar_stiffness == 0: raise ValueError("El piso no tiene rigidez torsional.")
+        # Filas: cortante por unidad de (Vx, Vy, Mz); columnas: elementos.
+        self.direct_x, self.direct_y = self.kx / sum_kx, self.ky / sum_ky
+        self.torsion_x, self.torsion_y = -self.kx * dy / self.polar_stiffness, self.ky * dx / self.polar_stiffness
+    def __len__(self): return len(self.ids)
+    def case_matrix(self, cases):
+        # (N, 3): Vx, Vy y el momento Mz respecto al CR de cada caso.
+        vx, vy, cm_x, cm_y = (np.array([getattr(case, name) for case in cases], float) for name in ('vx', 'vy', 'cm_x', 'cm_y'))
+        return np.column_stack([vx, vy, (cm_x - self.center_of_rigidity[0]) * vy - (cm_y - self.center_of_rigidity[1]) * vx])
+    def shears(self, cases):
+        # Matrices (N, M) de cortante en X y en Y de todos los elementos para los casos dados.
+        loads = self.case_matrix(cases)
+        return loads[:, [0, 2]] @ np.vstack([self.direct_x, self.torsion_x]), loads[:, [1, 2]] @ np.vstack([self.direct_y, self.torsion_y])
+    def governing(self, cases):
+        # Por elemento, el mayor |Fx| y |Fy| y el índice del caso que lo produce. Solo se evalúan los casos de la
+        # envolvente convexa y se recorre por bloques de elementos.
+        loads = self.case_matrix(cases); result = {}
+        for key, columns, coefficients in (('vx', [0, 2], (self.direct_x, self.torsion_x)), ('vy', [1, 2], (self.direct_y, self.torsion_y))):
+            candidates = np.array(_hull_cases(loads[:, columns])); reduced = loads[candidates][:, columns]; coefficients = np.vstack(coefficients)
+            shear, case = np.empty(len(self)), np.empty(len(self), np.int64)
+            for start in range(0, len(self), LATERAL_CHUNK_SIZE):
+                block = reduced @ coefficients[:, start:start + LATERAL_CHUNK_SIZE]; best = np.abs(block).argmax(axis=0)
+                shear[start:start + LATERAL_CHUNK_SIZE] = np.take_along_axis(block, best[None, :], axis=0)[0]; case[start:start + LATERAL_CHUNK_SIZE] = candidates[best]
+            result[key], result[key + '_case'] = shear, case
+        return result
+    def shear_table(self, cases):
+        # Filas por elemento (diccionarios) con coeficientes y cortantes de diseño, listas para CSV o JSON.
+        governing = self.governing(cases)
+        for i in range(len(self)):
+            yield {'id': int(self.ids[i]), 'type': 'wall' if self.kinds[i] == ElementArrays.WALL else 'column', 'x': float(self.x[i]), 'y': float(self.y[i]),
+                   'kx': float(self.kx[i]), 'ky': float(self.ky[i]), 'direct_x': float(self.direct_x[i]), 'direct_y': float(self.direct_y[i]),
+                   'torsion_x': float(self.torsion_x[i]), 'torsion_y': float(self.torsion_y[i]),
+                   'vx': float(governing['vx'][i]), 'vx_case': cases[governing['vx_case'][i]].name, 'vy': float(governing['vy'][i]), 'vy_case': cases[governing['vy_case'][i]].name}
@@ -0,0 +1,143 @@
+# Implementado por Nelson Esteban Hernandez Soto durante el curso de Diseño Sísmico de Mampostería
+# e-mail: nhernandez@unal.edu.co
+# Universidad Nacional de Colombia - 2025
+
+"""
+Importación de planos desde CSV y DXF (ASCII). Los lectores son generadores: recorren el archivo línea por línea y
+producen elementos en el esquema JSON de la aplicación ({"type": "column"|"wall", ...}) sin cargar el archivo
+completo. No dependen de Tkinter; la interfaz los ejecuta en un hilo aparte.
+
+CSV: una fila por elemento con encabezado. Se aceptan las columnas del esquema JSON (type, x, y, width, height,
+length, thickness, orientation) o un segmento de muro (x1, y1, x2, y2 y opcionalmente thickness).
+
+DXF: LINE y LWPOLYLINE abiertas se convierten en muros (un muro por segmento, con el espesor por defecto); las
+LWPOLYLINE cerradas rectangulares en un muro con el lado corto como espesor; los INSERT de bloques en columnas del
+tamaño del bloque (o del tamaño por defecto si el bloque no tiene geometría). Solo se importan elementos alineados
+con los ejes: los segmentos inclinados y los bloques girados un ángulo que no es múltiplo de 90° se cuentan como omitidos.
+"""
+
+import csv
+import math
+import os
+
+IMPORT_EXTENSIONS = ('.csv', '.dxf')
+DEFAULT_WALL_THICKNESS = 0.2  # m, para LINE/LWPOLYLINE y segmentos CSV sin espesor
+DEFAULT_COLUMN_SIZE = 0.4  # m, para bloques sin geometría
+AXIS_TOLERANCE = 1e-6  # desvío relativo admitido para considerar un segmento horizontal o vertical
+ANGLE_TOLERANCE = 1e-3  # grados admitidos de desvío respecto a un múltiplo de 90° en los INSERT
+
+class ImportStats:
+    # Conteo de lo leído; bytes_read permite mostrar el avance respecto al tamaño del archivo.
+    def __init__(self, total_bytes=0): self.total_bytes, self.bytes_read, self.elements, self.skipped = total_bytes, 0, 0, 0
+    def progress(self): return min(1.0, self.bytes_read / self.total_bytes) if self.total_bytes else 0.0
+
+def _lines(f, stats):
+    # Decodifica un archivo binario línea por línea llevando la cuenta de los bytes leídos. 'utf-8-sig' descarta el BOM
+    # que Excel pone al inicio de "CSV UTF-8"; si quedara en el encabezado, ninguna columna se reconocería.
+    for raw in f: stats.bytes_read += len(raw); yield raw.decode('utf-8-sig', errors='replace')
+
+def wall_from_segment(x1, y1, x2, y2, thickness):
+    # Muro centrado en el segmento; None si el segmento está inclinado o tiene longitud nula.
+    dx, dy = abs(x2 - x1), abs(y2 - y1); length = max(dx, dy)
+    if length == 0 or min(dx, dy) > AXIS_TOLERANCE * length: return None
+    return {'type': 'wall', 'x': (x1 + x2) / 2, 'y': (y1 + y2) / 2, 'length': length, 'thickness': thickness, 'orientation': 'H' if dx >= dy else 'V'}
+
+def wall_from_rectangle(points):
+    # Rectángulo alineado con los ejes (4 vértices): el lado largo es la longitud y el corto el espesor.
+    xs, ys = [x for x, _ in points], [y for _, y in points]; x0, x1, y0, y1 = min(xs), max(xs), min(ys), max(ys)
+    width, height = x1 - x0, y1 - y0; size = max(width, height)
+    if len(points) != 4 or size == 0 or any(min(abs(x - x0), abs(x - x1)) > AXIS_TOLERANCE * size or min(abs(y - y0), abs(y - y1)) > AXIS_TOLERANCE * size for x, y in points): return None
+    return {'type': 'wall', 'x': (x0 + x1) / 2, 'y': (y0 + y1) / 2, 'length': size, 'thickness': min(width, height), 'orientation': 'H' if width >= height else 'V'}
+
+# --- CSV ---
+def iter_csv_elements(f, stats, scale=1.0, wall_thickness=DEFAULT_WALL_THICKNESS):
+    for row in csv.DictReader(_lines(f, stats)):
+        row = {key.strip().lower(): value.strip() for key, value in row.items() if key and value}
+        try:
+            if 'x1' in row:
+                thickness = float(row['thickness']) * scale if 'thickness' in row else wall_thickness
+                element = wall_from_segment(*(float(row[key]) * scale for key in ('x1', 'y1', 'x2', 'y2')), thickness)
+            elif row.get('type', '').lower() == 'column':
+                element = {'type': 'column', 'x': float(row['x']) * scale, 'y': float(row['y']) * scale, 'width': float(row['width']) * scale, 'height': float(row['height']) * scale}
+            elif row.get('type', '').lower() == 'wall':
+                element = {'type': 'wall', 'x': float(row['x']) * scale, 'y': float(row['y']) * scale, 'length': float(row['length']) * scale,
+                           'thickness': float(row['thickness']) * scale, 'orientation': row.get('orientation', 'V').upper()}
+                if element['orientation'] not in ('H', 'V'): element = None
+            else: element = None
+        except (KeyError, ValueError): element = None
+        if element is None: stats.skipped += 1
+        else: stats.elements += 1; yield element
+
+# --- DXF ---
+def _dxf_pairs(lines):
+    # Pares (código de grupo, valor) del formato ASCII: dos líneas por par.
+    for code in lines:
+        value = next(lines, None)
+        if value is None: return
+        try: yield int(code), value.strip()
+        except ValueError: continue
+
+def _dxf_entities(pairs):
+    # Agrupa los pares en entidades (tipo, [(código, valor), ...]); cada código 0 abre una entidad nueva.
+    kind, data = None, []
+    for code, value in pairs:
+        if code == 0:
+            if kind is not None: yield kind, data
+            kind, data = value, []
+        else: data.append((code, value))
+    if kind is not None: yield kind, data
+
+def _vertices(data):
+    xs = [float(value) for code, value in data if code == 10]; ys = [float(value) for code, value in data if code == 20]; return list(zip(xs, ys))
+
+def iter_dxf_elements(f, stats, scale=1.0, wall_thickness=DEFAULT_WALL_THICKNESS, column_size=DEFAULT_COLUMN_SIZE):
+    # La sección BLOCKS (anterior a ENTITIES en DXF) solo se usa para medir la caja de cada bloque; block_boxes guarda
+    # (x0, y0, x1, y1, base_x, base_y) con el punto base del bloque, que es el que coincide con el punto de inserción.
+    section, block, base, block_boxes = None, None, (0.0, 0.0), {}
+    for kind, data in _dxf_entities(_dxf_pairs(_lines(f, stats))):
+        fields = dict(data)
+        if kind == 'SECTION': section = fields.get(2); continue
+        if kind == 'ENDSEC': section = None; continue
+        if section == 'BLOCKS':
+            if kind == 'BLOCK':
+                block = fields.get(2)
+                try: base = (float(fields.get(10, 0.0)), float(fields.get(20, 0.0)))
+                except ValueError: base = (0.0, 0.0)
+            elif kind == 'ENDBLK': block = None
+            elif block is not None and kind in ('LINE', 'LWPOLYLINE'):
+                try: points = [(float(fields[10]), float(fields[20])), (float(fields[11]), float(fields[21]))] if kind == 'LINE' else _vertices(data)
+                except (KeyError, ValueError): continue
+                x0, y0, x1, y1 = block_boxes.get(block, (math.inf, math.inf, -math.inf, -math.inf))[:4]
+                block_boxes[block] = (min([x0] + [x for x, _ in points]), min([y0] + [y for _, y in points]), max([x1] + [x for x, _ in points]), max([y1] + [y for _, y in points]), *base)
+            continue
+        if section != 'ENTITIES': continue
+        elements = []
+        try:
+            if kind == 'LINE': elements = [wall_from_segment(*(float(fields[code]) * scale for code in (10, 20, 11, 21)), wall_thickness)]
+            elif kind == 'LWPOLYLINE':
+                points = [(x * scale, y * scale) for x, y in _vertices(data)]; closed = int(fields.get(70, 0)) & 1
+                rectangle = wall_from_rectangle(points) if closed else None
+                if rectangle: elements = [rectangle]
+                else: elements = [wall_from_segment(*a, *b, wall_thickness) for a, b in zip(points, points[1:] + (points[:1] if closed else []))]
+            elif kind == 'INSERT':
+                half = column_size / 2 / scale; x0, y0, x1, y1, base_x, base_y = block_boxes.get(fields.get(2), (-half, -half, half, half, 0.0, 0.0))
+                sx, sy, angle = float(fields.get(41, 1.0)), float(fields.get(42, 1.0)), float(fields.get(50, 0.0))
+                width, height = abs(x1 - x0) * abs(sx) * scale, abs(y1 - y0) * abs(sy) * scale
+                offset_x, offset_y = ((x0 + x1) / 2 - base_x) * sx * scale, ((y0 + y1) / 2 - base_y) * sy * scale
+                # Giros de 90°, 180° y 270° en sentido antihorario: cada cuarto de vuelta rota el desfase e intercambia las medidas.
+                for _ in range(round(angle / 90) % 4): width, height, offset_x, offset_y = height, width, -offset_y, offset_x
+                x, y = float(fields[10]) * scale + offset_x, float(fields[20]) * scale + offset_y
+                square = abs(angle - 90 * round(angle / 90)) <= ANGLE_TOLERANCE
+                elements = [{'type': 'column', 'x': x, 'y': y, 'width': width, 'height': height}] if square and width > 0 and height > 0 else [None]
+            else: continue
+        except (KeyError, ValueError): elements = [None]
+        for element in elements:
+            if element is None: stats.skipped += 1
+            else: stats.elements += 1; yield element
+
+def iter_plan_elements(filepath, stats=None, scale=1.0, wall_thickness=DEFAULT_WALL_THICKNESS, column_size=DEFAULT_COLUMN_SIZE):
+    # Elige el lector por la extensión; stats (ImportStats) se actualiza mientras se consume el generador.
+    stats = stats or ImportStats(); stats.total_bytes = os.path.getsize(filepath)
+    with open(filepath, 'rb') as f:
+        if filepath.lower().endswith('.dxf'): yield from iter_dxf_elements(f, stats, scale, wall_thickness, column_size)
+        else: yield from iter_csv_elements(f, stats, scale, wall_thickness)
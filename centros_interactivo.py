@@ -12,9 +12,17 @@ de rigidez y visualizar la excentricidad respecto a un centro de masa dado por e
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog
 import math
+import csv
 import json
 import os
-import copy
+import time
+import queue
+import threading
+from collections import deque
+from centros_core import (Column, Wall, ElementArrays, SpatialIndex, Building, aggregate_small_elements, load_building,
+                          BINARY_MODEL_EXTENSION, save_binary_model, DesignVariable, OPTIMIZABLE_ATTRIBUTES, optimize_layout,
+                          ACCIDENTAL_ECCENTRICITY, standard_load_cases)
+from centros_import import IMPORT_EXTENSIONS, DEFAULT_WALL_THICKNESS, DEFAULT_COLUMN_SIZE, ImportStats, iter_plan_elements
 
 # --- Constantes y Configuración ---
 PIXELS_PER_METER = 40
@@ -24,85 +32,260 @@ COLUMN_COLOR = "#4a90e2"; WALL_COLOR = "#f5a623"
 SELECTION_COLOR = "#e0e0e0"
 CR_COLOR = "cyan"; CM_COLOR = "magenta"
 GRID_MIN_PIXEL_SPACING = 50
+FILE_TYPES = [("Archivos JSON","*.json"),("Modelo binario",f"*{BINARY_MODEL_EXTENSION}")]
+TARGET_FPS = 60  # límite de cuadros por segundo para arrastre, pan y zoom
+# Nivel de detalle: los umbrales se evalúan con la escala redondeada a una potencia de 2 (banda), de modo que el
+# dibujo solo se reconstruye al cruzar de banda y el resto del zoom se aplica como transformación.
+LOD_LABEL_PIXELS = 8  # tamaño mínimo (px) de un elemento para mostrar su etiqueta
+LOD_AGGREGATE_PIXELS = 2  # elementos más pequeños que esto se dibujan agrupados por celdas
+LOD_CELL_PIXELS = 4  # lado (px) de las celdas de agregación
+AGGREGATE_COLORS = ("#3b5573", "#4f77a6", "#6a9ad6", "#a8c8f0")  # de menor a mayor densidad
+PROFILED_METHODS = ('update_calculations', 'redraw_canvas', 'draw_grid_and_rulers', 'draw_aggregates', 'draw_elements', 'draw_markers',
+                    '_apply_view_transform', '_record_undo', 'undo_last_action', 'redo_last_action', '_write_configuration', 'open_configuration')
+PROFILE_WINDOW = 2.0  # segundos de historia para los promedios del indicador
+PROFILE_REFRESH_MS = 500  # periodo de actualización del indicador
+TRACE_EVENT_LIMIT = 200000  # eventos de la traza que se conservan (los más antiguos se descartan)
+IMPORT_BATCH_SIZE = 500  # elementos por lote enviado desde el hilo lector
+IMPORT_QUEUE_BATCHES = 8  # lotes en espera como máximo: si la interfaz se atrasa, el lector se detiene
+IMPORT_FRAME_BUDGET = 0.03  # segundos por ciclo de la interfaz dedicados a insertar elementos importados
+IMPORT_POLL_MS = 20
+OPTIMIZE_POLL_MS = 50  # periodo con que la interfaz revisa si terminó la optimización
 
-# --- Clases del Modelo de Datos ---
-class StructuralElement:
-    def __init__(self, x, y): self.x, self.y = float(x), float(y)
-    def get_center(self): return self.x, self.y
-    def get_rigidity_x(self): raise NotImplementedError
-    def get_rigidity_y(self): raise NotImplementedError
-    def draw(self, canvas, app_instance): raise NotImplementedError
-    def is_hit(self, model_x, model_y): raise NotImplementedError
-    def move(self, dx, dy): self.x, self.y = self.x + dx, self.y + dy
-class Column(StructuralElement):
-    count = 0
-    def __init__(self, x, y, width, height):
-        super().__init__(x, y); Column.count += 1; self.id = Column.count
-        self.width, self.height = float(width), float(height)
-    def get_rigidity_x(self): return self.height * (self.width ** 3)
-    def get_rigidity_y(self): return self.width * (self.height ** 3)
-    def get_bounding_box(self):
-        half_w, half_h = self.width / 2, self.height / 2
-        return (self.x - half_w, self.y - half_h, self.x + half_w, self.y + half_h)
-    def draw(self, canvas, app, is_selected=False):
-        x0, y0, x1, y1 = self.get_bounding_box(); vx0, vy0, vx1, vy1 = *app.model_to_view(x0, y0), *app.model_to_view(x1, y1)
-        outline_color, outline_width = (SELECTION_COLOR, 3) if is_selected else (COLUMN_COLOR, 1)
-        canvas.create_rectangle(vx0, vy0, vx1, vy1, fill=COLUMN_COLOR, outline=outline_color, width=outline_width)
-        cx, cy = app.model_to_view(self.x, self.y); canvas.create_text(cx, cy, text=f"C{self.id}", fill="white", font=("Arial", 8))
-    def is_hit(self, model_x, model_y):
-        x0, y0, x1, y1 = self.get_bounding_box(); return x0 <= model_x <= x1 and y0 <= model_y <= y1
-class Wall(StructuralElement):
-    count = 0
-    def __init__(self, x, y, length, thickness, orientation):
-        super().__init__(x, y); Wall.count += 1; self.id = Wall.count
-        self.length, self.thickness, self.orientation = float(length), float(thickness), orientation
-    def get_rigidity_y(self): return self.thickness * (self.length ** 3) if self.orientation == 'V' else self.length * (self.thickness ** 3)
-    def get_rigidity_x(self): return self.thickness * (self.length ** 3) if self.orientation == 'H' else self.length * (self.thickness ** 3)
-    def get_bounding_box(self):
-        if self.orientation == 'V':
-            half_t, half_l = self.thickness / 2, self.length / 2
-            return (self.x - half_t, self.y - half_l, self.x + half_t, self.y + half_l)
-        else:
-            half_l, half_t = self.length / 2, self.thickness / 2
-            return (self.x - half_l, self.y - half_t, self.x + half_l, self.y + half_t)
-    def draw(self, canvas, app, is_selected=False):
-        x0, y0, x1, y1 = self.get_bounding_box(); vx0, vy0, vx1, vy1 = *app.model_to_view(x0, y0), *app.model_to_view(x1, y1)
-        outline_color, outline_width = (SELECTION_COLOR, 3) if is_selected else (WALL_COLOR, 1)
-        canvas.create_rectangle(vx0, vy0, vx1, vy1, fill=WALL_COLOR, outline=outline_color, width=outline_width)
-        cx, cy = app.model_to_view(self.x, self.y); canvas.create_text(cx, cy, text=f"M{self.id}", fill="black", font=("Arial", 8))
-    def is_hit(self, model_x, model_y):
-        x0, y0, x1, y1 = self.get_bounding_box(); return x0 <= model_x <= x1 and y0 <= model_y <= y1
+# --- Perfilador ---
+class Profiler:
+    # Mide la duración de cada llamada a PROFILED_METHODS y de cada cuadro del planificador. Los métodos se envuelven
+    # en la instancia solo mientras está activo; al desactivarlo se eliminan los envoltorios y el costo es nulo.
+    def __init__(self, app):
+        self.app, self.enabled, self.origin = app, False, time.perf_counter()
+        self.events = deque(maxlen=TRACE_EVENT_LIMIT); self.frames, self.recalcs = deque(), deque()
+    def enable(self):
+        if self.enabled: return
+        self.enabled = True
+        for name in PROFILED_METHODS: setattr(self.app, name, self._wrap(name, getattr(self.app, name)))
+        self.app.scheduler.flush = self._wrap('frame', self.app.scheduler.flush)
+    def disable(self):
+        if not self.enabled: return
+        self.enabled = False
+        for name in PROFILED_METHODS: self.app.__dict__.pop(name, None)
+        self.app.scheduler.__dict__.pop('flush', None)
+    def _wrap(self, name, method):
+        def profiled(*args, **kwargs):
+            start = time.perf_counter()
+            try: return method(*args, **kwargs)
+            finally: self._record(name, start, time.perf_counter())
+        return profiled
+    def _record(self, name, start, end):
+        self.events.append(('X', name, start, end - start, None))
+        if name == 'frame': self.frames.append((end, end - start))
+        elif name == 'update_calculations': self.recalcs.append(end)
+    def counter(self, name, values): self.events.append(('C', name, time.perf_counter(), 0.0, values))
+    def stats(self):
+        # Tiempo de cuadro medio y p95, cuadros y recálculos por segundo y la llamada más lenta de la ventana.
+        now = time.perf_counter(); limit = now - PROFILE_WINDOW
+        while self.frames and self.frames[0][0] < limit: self.frames.popleft()
+        while self.recalcs and self.recalcs[0] < limit: self.recalcs.popleft()
+        durations = sorted(duration for _, duration in self.frames); slowest = None
+        for kind, name, start, duration, _ in reversed(self.events):
+            if start < limit: break
+            if kind == 'X' and name != 'frame' and (slowest is None or duration > slowest[1]): slowest = (name, duration)
+        return {'frame_ms': 1000 * sum(durations) / len(durations) if durations else 0.0, 'frame_p95_ms': 1000 * durations[int(0.95 * (len(durations) - 1))] if durations else 0.0,
+                'fps': len(durations) / PROFILE_WINDOW, 'recalcs_per_s': len(self.recalcs) / PROFILE_WINDOW, 'slowest': slowest}
+    def export_chrome_trace(self, filepath):
+        # Formato de eventos de Chrome (chrome://tracing, Perfetto): 'X' para llamadas y 'C' para contadores, en µs.
+        trace = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'Calculadora de CR'}}]
+        for kind, name, start, duration, values in self.events:
+            event = {'name': name, 'ph': kind, 'ts': (start - self.origin) * 1e6, 'pid': 1, 'tid': 1}
+            if kind == 'X': event['dur'] = duration * 1e6
+            else: event['args'] = values
+            trace.append(event)
+        with open(filepath, 'w') as f: json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+
+# --- Importación de planos ---
+class PlanImport:
+    # Lee un CSV/DXF en un hilo aparte y entrega lotes a la interfaz por una cola acotada: el archivo nunca está completo
+    # en memoria y la interfaz inserta los elementos por tramos de IMPORT_FRAME_BUDGET. Al terminar, la importación
+    # queda como un solo paso de deshacer; al cancelar se retiran los elementos ya insertados.
+    def __init__(self, app, filepath, options):
+        self.app, self.filepath, self.stats, self.entries = app, filepath, ImportStats(), []
+        self.queue, self.cancelled = queue.Queue(maxsize=IMPORT_QUEUE_BATCHES), threading.Event()
+        self.window = tk.Toplevel(app); self.window.title("Importando plano"); self.window.transient(app); self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        ttk.Label(self.window, text=os.path.basename(filepath)).pack(anchor='w', padx=10, pady=(10, 2))
+        self.progress = ttk.Progressbar(self.window, length=320, maximum=100); self.progress.pack(padx=10, pady=2)
+        self.status = ttk.Label(self.window, text="Leyendo..."); self.status.pack(anchor='w', padx=10, pady=2)
+        ttk.Button(self.window, text="Cancelar", command=self.cancel).pack(pady=(2, 10)); self.window.grab_set()
+        threading.Thread(target=self._read, args=(options,), daemon=True).start(); app.after(IMPORT_POLL_MS, self._poll)
+    def _read(self, options):
+        # Hilo lector: no toca Tk ni el modelo, solo produce lotes de diccionarios.
+        try:
+            batch = []
+            for element in iter_plan_elements(self.filepath, self.stats, **options):
+                batch.append(element)
+                if len(batch) == IMPORT_BATCH_SIZE:
+                    if not self._put(('batch', batch)): return
+                    batch = []
+            if self._put(('batch', batch)): self._put(('done', None))
+        except Exception as e: self._put(('error', f"{type(e).__name__}: {e}"))
+    def _put(self, message):
+        while not self.cancelled.is_set():
+            try: self.queue.put(message, timeout=0.1); return True
+            except queue.Full: pass
+        return False
+    def _poll(self):
+        if self.cancelled.is_set(): return
+        deadline = time.perf_counter() + IMPORT_FRAME_BUDGET
+        try:
+            while time.perf_counter() < deadline:
+                kind, payload = self.queue.get_nowait()
+                if kind == 'batch': self._insert(payload)
+                elif kind == 'done': self._finish(); return
+                else: self._close(); self._rollback(); messagebox.showerror("Error al importar", f"No se pudo leer el plano:\n{payload}"); return
+        except queue.Empty: pass
+        self.progress['value'] = 100 * self.stats.progress()
+        self.status.config(text=f"{len(self.entries)} elementos importados, {self.stats.skipped} omitidos")
+        self.app.after(IMPORT_POLL_MS, self._poll)
+    def _insert(self, batch):
+        for data in batch:
+            counts_before = (Column.count, Wall.count); properties = {key: value for key, value in data.items() if key != 'type'}
+            element = self.app._insert_element(Column(**properties) if data['type'] == 'column' else Wall(**properties))
+            self.entries.append({'kind': 'add', 'element': element, 'counts_before': counts_before, 'counts_after': (Column.count, Wall.count)})
+        self.app.update_and_redraw()
+    def _rollback(self):
+        for entry in reversed(self.entries): self.app._apply_history_entry(entry, undo=True)
+        self.entries = []; self.app._update_inspector_panel(); self.app.update_and_redraw()
+    def _close(self): self.cancelled.set(); self.window.grab_release(); self.window.destroy(); self.app.importer = None
+    def cancel(self): self._close(); self._rollback()
+    def _finish(self):
+        self._close()
+        if self.entries: self.app._record_undo({'kind': 'batch', 'entries': self.entries})
+        self.app.update_and_redraw(); self.app.fit_to_view()
+        messagebox.showinfo("Importación terminada", f"{len(self.entries)} elementos importados, {self.stats.skipped} omitidos.")
+
+# --- Optimización en segundo plano ---
+class LayoutOptimization:
+    # Ejecuta optimize_layout en un hilo aparte, como PlanImport, para que la interfaz siga respondiendo. La ventana
+    # retiene el ratón y App._busy() bloquea los atajos que editan el modelo; aun así, el resultado solo se aplica si el
+    # piso y su versión de rigidez siguen siendo los del inicio. Cancelar detiene la búsqueda entre tareas.
+    def __init__(self, app, variables, options):
+        self.app, self.result, self.error, self.cancelled = app, None, None, threading.Event()
+        self.state = (app.storey, app.rigidity.version)
+        self.window = tk.Toplevel(app); self.window.title("Optimizando"); self.window.transient(app); self.window.resizable(False, False)
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
+        ttk.Label(self.window, text=f"Buscando entre {options['samples']:,} candidatos ({len(variables)} variables)...").pack(anchor='w', padx=10, pady=(10, 2))
+        self.progress = ttk.Progressbar(self.window, length=320, mode='indeterminate'); self.progress.pack(padx=10, pady=2); self.progress.start()
+        ttk.Button(self.window, text="Cancelar", command=self.cancel).pack(pady=(2, 10)); self.window.grab_set()
+        arguments = (app.elements, app.center_of_mass, variables, options['weights'], options['samples'])
+        self.thread = threading.Thread(target=self._run, args=(arguments, app.rigidity), daemon=True); self.thread.start()
+        app.after(OPTIMIZE_POLL_MS, self._poll)
+    def _run(self, arguments, sums):
+        try: self.result = optimize_layout(*arguments, sums=sums, cancel=self.cancelled)
+        except (ValueError, RuntimeError) as e: self.error = str(e)
+        except Exception as e: self.error = f"{type(e).__name__}: {e}"
+    def _poll(self):
+        if self.cancelled.is_set(): return
+        if self.thread.is_alive(): self.app.after(OPTIMIZE_POLL_MS, self._poll); return
+        self._close()
+        if self.error: messagebox.showerror("Optimización", self.error); return
+        if (self.app.storey, self.app.rigidity.version) != self.state:
+            messagebox.showerror("Optimización", "El modelo cambió durante la búsqueda; vuelva a optimizar."); return
+        result = self.result
+        message = f"Candidatos evaluados: {result['evaluated']:,}\nex = {result['ex']:.4f} m   ey = {result['ey']:.4f} m\n\n¿Aplicar la nueva distribución?"
+        if messagebox.askyesno("Resultado de la optimización", message): self.app._apply_layout(result['changes'])
+    def _close(self): self.progress.stop(); self.window.grab_release(); self.window.destroy(); self.app.optimization = None
+    def cancel(self): self.cancelled.set(); self._close()
+
+# --- Planificador de cuadros ---
+class FrameScheduler:
+    # Acumula los cambios de vista (pan/zoom como una transformación afín), los elementos y celdas agrupadas a redibujar
+    # y el recálculo pendiente, y los aplica como máximo una vez por cuadro mediante after/after_idle.
+    def __init__(self, app, target_fps=TARGET_FPS):
+        self.app, self.target_fps = app, target_fps; self.job, self.last_flush, self.recalc = None, 0.0, False
+        self.discard_render()
+    def discard_render(self): self.scale, self.dx, self.dy, self.dirty, self.cells = 1.0, 0.0, 0.0, {}, set()
+    def pan(self, dx, dy): self.dx += dx; self.dy += dy; self._schedule()
+    def zoom(self, factor, vx, vy):
+        self.scale *= factor; self.dx = factor * self.dx + vx * (1 - factor); self.dy = factor * self.dy + vy * (1 - factor); self._schedule()
+    def touch(self, elem): self.dirty[elem] = None; self._schedule()
+    def forget(self, elem): self.dirty.pop(elem, None)
+    def touch_cell(self, key): self.cells.add(key); self._schedule()
+    def request_recalc(self): self.recalc = True; self._schedule()
+    def _schedule(self):
+        if self.job is not None: return
+        wait_ms = int(max(0.0, self.last_flush + 1 / self.target_fps - time.perf_counter()) * 1000)
+        self.job = self.app.after(wait_ms, self.flush) if wait_ms else self.app.after_idle(self.flush)
+    def flush(self):
+        if self.job is not None: self.app.after_cancel(self.job); self.job = None
+        self.last_flush = time.perf_counter()
+        (scale, dx, dy, dirty, cells), recalc = (self.scale, self.dx, self.dy, self.dirty, self.cells), self.recalc
+        self.discard_render(); self.recalc = False
+        if recalc: self.app.update_calculations()
+        view_changed = (scale, dx, dy) != (1.0, 0.0, 0.0)
+        if view_changed: self.app._apply_view_transform(scale, dx, dy)
+        for key in cells: self.app._draw_cell(key)
+        for elem in dirty: self.app._refresh_element(elem)
+        if recalc or view_changed: self.app.draw_markers()
+
+def _storey_attribute(name):
+    return property(lambda self: getattr(self.storey, name), lambda self, value: setattr(self.storey, name, value))
 
 class App(tk.Tk):
+    # El modelo que se edita es siempre el del piso activo (self.storey); cada piso conserva sus propias cachés.
+    elements, center_of_mass, rigidity = _storey_attribute('elements'), _storey_attribute('center_of_mass'), _storey_attribute('rigidity')
+    spatial_index, history = _storey_attribute('spatial_index'), _storey_attribute('history')
     def __init__(self):
         super().__init__()
-        self.elements = []; self.center_of_mass, self.center_of_rigidity = (0.0, 0.0), None
+        self._init_state()
+        self.move_step = tk.DoubleVar(value=0.1); self.defer_recalc = tk.BooleanVar(value=False); self.profiling = tk.BooleanVar(value=False)
+        self.create_widgets(); self.bind_events()
+        self.update_window_title(); self.update_calculations(); self.fit_to_view()
+    def _init_state(self):
+        # Estado del modelo y de la vista, sin widgets (también lo usa la app sin interfaz de centros_bench.py).
+        self.building = Building(); self.storey = self.building.storeys[0]; self.storey.spatial_index = SpatialIndex(); self.center_of_rigidity = None
         self.zoom, self.pan_offset_x, self.pan_offset_y = 1.0, 0, 0
         self.selected_element, self.drag_start_pos, self.pan_start_pos = None, None, None
         self.current_filepath = None
-        self.undo_stack = []; self.undo_limit = 20
-        self.move_step = tk.DoubleVar(value=0.1)
-        self.create_widgets(); self.bind_events()
-        self.update_window_title(); self.update_calculations(); self.fit_to_view()
+        self.drag_origin = None; self.design_variables = []
+        self.canvas_items = {}; self.marker_items = None; self.lod_band, self.lod_scale, self.lod_elements, self.lod_cells = None, 1.0, None, None; self.drawn_rect = None
+        self.scheduler = FrameScheduler(self); self.profiler = Profiler(self); self.importer = self.optimization = None
 
     def create_widgets(self):
         menubar = tk.Menu(self); self.config(menu=menubar)
         file_menu = tk.Menu(menubar, tearoff=0); menubar.add_cascade(label="Archivo", menu=file_menu)
         file_menu.add_command(label="Nuevo", command=self.clear_configuration, accelerator="Ctrl+N")
         file_menu.add_command(label="Abrir...", command=self.load_configuration, accelerator="Ctrl+O")
+        file_menu.add_command(label="Importar CSV/DXF...", command=self.import_plan)
         file_menu.add_separator(); file_menu.add_command(label="Guardar", command=self.save_configuration, accelerator="Ctrl+S")
         file_menu.add_command(label="Guardar como...", command=self.save_configuration_as, accelerator="Ctrl+Shift+S")
+        view_menu = tk.Menu(menubar, tearoff=0); menubar.add_cascade(label="Ver", menu=view_menu)
+        view_menu.add_checkbutton(label="Perfilador", variable=self.profiling, command=self.toggle_profiler, accelerator="F12")
+        view_menu.add_command(label="Exportar traza...", command=self.export_trace)
+        analysis_menu = tk.Menu(menubar, tearoff=0); menubar.add_cascade(label="Análisis", menu=analysis_menu)
+        analysis_menu.add_command(label="Casos de carga y cortantes...", command=self.analyze_load_cases)
         main_frame = ttk.Frame(self); main_frame.pack(fill=tk.BOTH, expand=True)
+        self.status_bar = ttk.Label(self, anchor='w', relief=tk.SUNKEN, padding=(5, 2)); self.main_frame = main_frame
         control_panel = ttk.Frame(main_frame, width=250); control_panel.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10); control_panel.pack_propagate(False)
         self.canvas = tk.Canvas(main_frame, bg=CANVAS_BG_COLOR); self.canvas.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
         ttk.Label(control_panel, text="Controles", font=("Arial", 16, "bold")).pack(pady=10)
+        storey_frame = ttk.LabelFrame(control_panel, text="Pisos"); storey_frame.pack(fill=tk.X, pady=5)
+        self.storey_selector = ttk.Combobox(storey_frame, state="readonly"); self.storey_selector.pack(fill=tk.X, padx=5, pady=2)
+        self.storey_selector.bind("<<ComboboxSelected>>", lambda e: self._select_storey())
+        storey_buttons = ttk.Frame(storey_frame); storey_buttons.pack(fill=tk.X, padx=5, pady=2)
+        for text, command in (("Nuevo", self.add_storey), ("Copiar", self.copy_storey), ("Recalcular", self.recompute_building)):
+            ttk.Button(storey_buttons, text=text, command=command, width=9).pack(side=tk.LEFT, expand=True, fill=tk.X)
         ttk.Button(control_panel, text="Añadir Columna", command=self.add_column).pack(fill=tk.X, pady=5)
         ttk.Button(control_panel, text="Añadir Muro", command=self.add_wall).pack(fill=tk.X, pady=5)
         ttk.Button(control_panel, text="Ajustar Vista", command=self.fit_to_view).pack(fill=tk.X, pady=5)
-        ttk.Button(control_panel, text="Deshacer", command=self.undo_last_action).pack(fill=tk.X, pady=5)
+        ttk.Button(control_panel, text="Deshacer", command=lambda: self.undo_last_action()).pack(fill=tk.X, pady=5)
+        ttk.Button(control_panel, text="Rehacer", command=lambda: self.redo_last_action()).pack(fill=tk.X, pady=5)
+        optimizer_frame = ttk.LabelFrame(control_panel, text="Optimización"); optimizer_frame.pack(fill=tk.X, pady=5)
+        self.design_variables_label = ttk.Label(optimizer_frame, text="Variables: 0"); self.design_variables_label.pack(anchor='w', padx=5)
+        optimizer_buttons = ttk.Frame(optimizer_frame); optimizer_buttons.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Button(optimizer_buttons, text="Optimizar...", command=self.optimize_layout).pack(side=tk.LEFT, expand=True, fill=tk.X)
+        ttk.Button(optimizer_buttons, text="Limpiar", command=self.clear_design_variables).pack(side=tk.LEFT, expand=True, fill=tk.X)
         ttk.Separator(control_panel, orient='horizontal').pack(fill='x', pady=15)
         move_frame = ttk.LabelFrame(control_panel, text="Movimiento Preciso"); move_frame.pack(fill=tk.X, pady=(10, 5))
         ttk.Label(move_frame, text="Paso (m):").pack(side=tk.LEFT, padx=5); ttk.Entry(move_frame, textvariable=self.move_step, width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(control_panel, text="Recalcular al soltar", variable=self.defer_recalc).pack(anchor='w', pady=(0, 5))
         cm_frame = ttk.LabelFrame(control_panel, text="Centro de Masa (m)"); cm_frame.pack(fill=tk.X, pady=5)
         self.cm_x_var = tk.StringVar(value=str(self.center_of_mass[0])); self.cm_y_var = tk.StringVar(value=str(self.center_of_mass[1]))
         ttk.Label(cm_frame, text="X:").grid(row=0, column=0, padx=5, pady=2); ttk.Entry(cm_frame, textvariable=self.cm_x_var, width=8).grid(row=0, column=1, padx=5, pady=2)
@@ -118,29 +301,66 @@ class App(tk.Tk):
         self.inspector_labels = {}
         for field in ["Tipo", "ID", "X", "Y", "Dim 1", "Dim 2", "Orientación"]:
             label_widget = ttk.Label(self.inspector_frame, text=f"{field}:"); label_widget.pack(anchor='w', padx=5); self.inspector_labels[field.lower().replace(" ", "_")] = label_widget
-        self._update_inspector_panel()
+        self._update_inspector_panel(); self._refresh_storey_selector()
 
     def bind_events(self):
         self.bind_all("<Control-n>", lambda e: self.clear_configuration()); self.bind_all("<Control-o>", lambda e: self.load_configuration())
         self.bind_all("<Control-s>", lambda e: self.save_configuration()); self.bind_all("<Control-Shift-S>", lambda e: self.save_configuration_as())
+        self.bind_all("<F12>", lambda e: (self.profiling.set(not self.profiling.get()), self.toggle_profiler()))
         self.bind_all("<Control-z>", lambda e: self.undo_last_action())
+        self.bind_all("<Control-y>", lambda e: self.redo_last_action()); self.bind_all("<Control-Shift-Z>", lambda e: self.redo_last_action())
         for key in ["<Up>", "<Down>", "<Left>", "<Right>"]: self.bind_all(key, self._move_with_keys)
-        self.canvas.bind("<Configure>", self.redraw_canvas); self.canvas.bind("<MouseWheel>", self.on_zoom)
+        self.canvas.bind("<Configure>", lambda e: self.redraw_canvas()); self.canvas.bind("<MouseWheel>", self.on_zoom)
         self.canvas.bind("<ButtonPress-2>", self.on_pan_start); self.canvas.bind("<B2-Motion>", self.on_pan_drag)
         self.canvas.bind("<ButtonPress-1>", self.on_mouse_down); self.canvas.bind("<B1-Motion>", self.on_mouse_move); self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
         self.canvas.bind("<ButtonPress-3>", self.show_context_menu)
 
-    def _save_state_for_undo(self):
-        state = {'elements': copy.deepcopy(self.elements), 'center_of_mass': copy.deepcopy(self.center_of_mass), 'column_count': Column.count, 'wall_count': Wall.count}
-        self.undo_stack.append(state)
-        if len(self.undo_stack) > self.undo_limit: self.undo_stack.pop(0)
+    # --- Perfilador ---
+    def toggle_profiler(self):
+        if self.profiling.get():
+            self.profiler.enable(); self.status_bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.main_frame); self._refresh_profile_overlay()
+        else: self.profiler.disable(); self.status_bar.pack_forget()
+    def _refresh_profile_overlay(self):
+        if not self.profiler.enabled: return
+        # Cuenta los ítems que la aplicación conserva (elementos dibujados y celdas agrupadas) en lugar de pedirle todos a Tk.
+        stats = self.profiler.stats(); items = {'elements': len(self.canvas_items), 'cells': len(self.lod_cells or ())}; undo_bytes = self.history.memory_size()
+        self.profiler.counter('canvas', items); self.profiler.counter('undo', {'bytes': undo_bytes})
+        self.profiler.counter('rates', {'fps': stats['fps'], 'recalcs_per_s': stats['recalcs_per_s']})
+        slowest = f"  |  más lento: {stats['slowest'][0]} {1000 * stats['slowest'][1]:.1f} ms" if stats['slowest'] else ""
+        self.status_bar.config(text=f"Cuadro: {stats['frame_ms']:.1f} ms (p95 {stats['frame_p95_ms']:.1f})  |  {stats['fps']:.0f} cuadros/s  |  "
+                                    f"{stats['recalcs_per_s']:.0f} recálculos/s  |  ítems: {items['elements']} elementos, {items['cells']} celdas  |  deshacer: {undo_bytes / 1024:.0f} KB{slowest}")
+        self.after(PROFILE_REFRESH_MS, self._refresh_profile_overlay)
+    def export_trace(self):
+        filepath=filedialog.asksaveasfilename(defaultextension=".json",filetypes=[("Traza de Chrome","*.json")],title="Exportar traza")
+        if not filepath: return
+        try: self.profiler.export_chrome_trace(filepath)
+        except Exception as e: messagebox.showerror("Error al exportar",f"No se pudo guardar la traza:\n{e}")
 
+    def _record_undo(self, entry, merge_key=None): self.history.push(entry, merge_key)
+    def _busy(self):
+        # Mientras se importa u optimiza, la ventana modal retiene el ratón pero los atajos de bind_all siguen llegando:
+        # los manejadores que cambian o reemplazan el modelo no hacen nada hasta que termine.
+        return self.importer is not None or self.optimization is not None
     def undo_last_action(self):
-        if not self.undo_stack: return
-        state = self.undo_stack.pop(); self.elements = state['elements']; self.center_of_mass = state['center_of_mass']
-        Column.count = state['column_count']; Wall.count = state['wall_count']
-        self.cm_x_var.set(str(self.center_of_mass[0])); self.cm_y_var.set(str(self.center_of_mass[1]))
-        self.selected_element = None; self._update_inspector_panel(); self.update_and_redraw()
+        if self._busy(): return
+        entry = self.history.pop_undo()
+        if entry: self._apply_history_entry(entry, undo=True); self._update_inspector_panel(); self.update_and_redraw()
+    def redo_last_action(self):
+        if self._busy(): return
+        entry = self.history.pop_redo()
+        if entry: self._apply_history_entry(entry, undo=False); self._update_inspector_panel(); self.update_and_redraw()
+    def _apply_history_entry(self, entry, undo):
+        kind = entry['kind']
+        if kind == 'batch':
+            for sub_entry in (reversed(entry['entries']) if undo else entry['entries']): self._apply_history_entry(sub_entry, undo)
+        elif kind == 'move': sign = -1 if undo else 1; self._move_element(entry['element'], sign * entry['dx'], sign * entry['dy'])
+        elif kind == 'edit': self._update_element(entry['element'], entry['before' if undo else 'after'])
+        elif kind == 'cm': self._set_center_of_mass(entry['before' if undo else 'after'])
+        elif (kind == 'add') == undo:
+            entry['position'] = self._remove_element(entry['element'])
+            if self.selected_element == entry['element']: self._set_selected(None)
+        else: self._restore_element(entry['element'], entry['position'])
+        if kind == 'add': Column.count, Wall.count = entry['counts_before' if undo else 'counts_after']
 
     def _update_inspector_panel(self):
         elem = self.selected_element
@@ -157,7 +377,7 @@ class App(tk.Tk):
             for key, label in self.inspector_labels.items(): label.config(text=f"{key.replace('_', ' ').capitalize()}: N/A")
 
     def _move_with_keys(self, event):
-        if not self.selected_element: return
+        if not self.selected_element or self._busy(): return
         try: step = self.move_step.get()
         except tk.TclError: return
         dx, dy = 0, 0
@@ -166,13 +386,109 @@ class App(tk.Tk):
         elif event.keysym == "Left": dx = -step
         elif event.keysym == "Right": dx = step
         else: return
-        self._save_state_for_undo(); self.selected_element.move(dx, dy); self._update_inspector_panel(); self.update_and_redraw()
+        self._move_element(self.selected_element, dx, dy)
+        self._record_undo({'kind': 'move', 'element': self.selected_element, 'dx': dx, 'dy': dy}, merge_key=('nudge', self.selected_element))
+        self._update_inspector_panel(); self.update_and_redraw()
+
+    # --- Mutaciones del modelo (mantienen sincronizados los acumuladores) ---
+    def _own_element(self, element=None):
+        # Copia privada (copy-on-write) de lo que el piso activo aún comparte con un piso copiado, antes de modificarlo.
+        if not self.storey.shared: return element
+        elements = self.elements; owned = self.storey.own(element)
+        if self.elements is not elements:
+            if self.selected_element is not None: self.selected_element = self.elements.view(self.selected_element._row)
+            for var in self.design_variables: var.element = self.elements.view(var.element._row)
+            self.spatial_index.rebuild(self.elements); self.redraw_canvas()
+        elif owned is not element:
+            self.spatial_index.insert(owned, self.spatial_index.remove(element)); self.scheduler.forget(element)
+            if element in self.canvas_items: self.canvas_items[owned] = self.canvas_items.pop(element)
+            if self.lod_elements is not None and element in self.lod_elements: self.lod_elements[owned] = self.lod_elements.pop(element)
+            if self.selected_element is element: self.selected_element = owned
+            for var in self.design_variables:
+                if var.element is element: var.element = owned
+        return owned
+    def _insert_element(self, element):
+        self._own_element(); element = self.elements.append(element) or element; self.rigidity.add(element); self.spatial_index.insert(element)
+        self._lod_add(element); self.scheduler.touch(element); return element
+    def _remove_element(self, element):
+        # Devuelve (índice en la lista, orden de dibujo) para poder restaurar el elemento en su lugar.
+        element = self._own_element(element); self._lod_discard(element)
+        if isinstance(self.elements, ElementArrays): index = None; self.elements.remove(element)
+        else:
+            # Deshacer altas (p. ej. una importación) quita elementos del final: se evita el recorrido de index().
+            index = len(self.elements) - 1 if self.elements and self.elements[-1] is element else self.elements.index(element); del self.elements[index]
+        self.rigidity.remove(element); seq = self.spatial_index.remove(element); self._forget_element(element); self.scheduler.forget(element)
+        return index, seq
+    def _restore_element(self, element, position):
+        index, seq = position; element = self._own_element(element)
+        if index is None: self.elements.restore(element)
+        else: self.elements.insert(index, element)
+        self.rigidity.add(element); self.spatial_index.insert(element, seq); self._lod_add(element); self.scheduler.touch(element)
+    def _move_element(self, element, dx, dy):
+        element = self._own_element(element); self._lod_discard(element)
+        element.move(dx, dy); self.rigidity.move(element, dx, dy); self.spatial_index.update(element); self._lod_add(element); self.scheduler.touch(element); return element
+    def _update_element(self, element, properties):
+        element = self._own_element(element); self.rigidity.remove(element); self._lod_discard(element)
+        for key, value in properties.items(): setattr(element, key, value)
+        self.rigidity.add(element); self.spatial_index.update(element); self._lod_add(element); self.scheduler.touch(element); return element
+
+    # --- Pisos ---
+    def _set_building(self, building, fit=False): self.building = building; self._activate_storey(building.storeys[0], fit)
+    def _activate_storey(self, storey, fit=False):
+        # Cambiar de piso no recalcula los demás: cada piso guarda sus sumas de rigidez y su índice espacial.
+        self.storey = storey; self.selected_element = self.drag_start_pos = self.drag_origin = None; self.clear_design_variables()
+        if storey.dirty: storey.recompute()
+        self.cm_x_var.set(str(storey.center_of_mass[0])); self.cm_y_var.set(str(storey.center_of_mass[1]))
+        self._refresh_storey_selector(); self._update_inspector_panel(); self.update_calculations(); self.update_idletasks()
+        if storey.spatial_index is None: storey.spatial_index = SpatialIndex(storey.elements)
+        if fit: self.fit_to_view()
+        else: self.redraw_canvas()
+    def _refresh_storey_selector(self):
+        self.storey_selector.config(values=[storey.name for storey in self.building.storeys]); self.storey_selector.current(self.building.storeys.index(self.storey))
+    def _select_storey(self):
+        # El selector sigue aceptando teclado durante una importación u optimización: se vuelve al piso activo.
+        if self._busy(): self._refresh_storey_selector(); return
+        self._activate_storey(self.building.storeys[self.storey_selector.current()])
+    def add_storey(self): self._activate_storey(self.building.add_storey())
+    def copy_storey(self): self._activate_storey(self.building.copy_storey(self.storey))
+    def recompute_building(self):
+        self.building.recompute(); self.update_calculations(); lines = []
+        for storey in self.building.storeys:
+            center, eccentricity = storey.center_of_rigidity(), storey.eccentricity()
+            if center is None: lines.append(f"{storey.name}: CR N/A")
+            else: lines.append(f"{storey.name}: CR=({center[0]:.3f}, {center[1]:.3f})  ex={eccentricity[0]:.3f}  ey={eccentricity[1]:.3f}")
+        messagebox.showinfo("Resumen del edificio", "\n".join(lines))
+
+    # --- Optimización de la distribución ---
+    def add_design_variable(self, element):
+        dialog = DesignVariableDialog(self, title="Variable de diseño", element=element)
+        if dialog.result: self.design_variables.append(dialog.result); self.design_variables_label.config(text=f"Variables: {len(self.design_variables)}")
+    def clear_design_variables(self): self.design_variables = []; self.design_variables_label.config(text="Variables: 0")
+    def _live_design_variables(self):
+        # Descarta las variables de elementos que se borraron después de definirlas.
+        if isinstance(self.elements, ElementArrays): return [var for var in self.design_variables if var.element._store is self.elements and self.elements.alive[var.element._row]]
+        live = {id(elem) for elem in self.elements}; return [var for var in self.design_variables if id(var.element) in live]
+    def optimize_layout(self):
+        if self._busy(): return
+        variables = self._live_design_variables()
+        if not variables: messagebox.showinfo("Optimización", "Defina variables de diseño con clic derecho sobre un elemento."); return
+        dialog = OptimizeDialog(self, title="Optimizar distribución")
+        if dialog.result: self.optimization = LayoutOptimization(self, variables, dialog.result)
+    def _apply_layout(self, changes):
+        # Todos los cambios quedan en una sola entrada 'batch': un Deshacer revierte la optimización completa.
+        # Si el piso comparte su ElementArrays se privatiza antes, y las vistas del resultado se pasan al nuevo arreglo.
+        entries = []; self._own_element()
+        if isinstance(self.elements, ElementArrays): changes = {self.elements.view(element._row): properties for element, properties in changes.items()}
+        for element, properties in changes.items():
+            before = {key: getattr(element, key) for key in properties}
+            element = self._update_element(element, properties); entries.append({'kind': 'edit', 'element': element, 'before': before, 'after': properties})
+        self._record_undo({'kind': 'batch', 'entries': entries}); self._update_inspector_panel(); self.update_and_redraw()
 
     def add_element(self, element_class, properties):
-        self._save_state_for_undo()
+        counts_before = (Column.count, Wall.count)
         try:
-            new_element = element_class(**properties)
-            self.elements.append(new_element); self.selected_element = new_element
+            new_element = self._insert_element(element_class(**properties)); self._set_selected(new_element)
+            self._record_undo({'kind': 'add', 'element': new_element, 'counts_before': counts_before, 'counts_after': (Column.count, Wall.count)})
             self._update_inspector_panel(); self.update_and_redraw()
         except (ValueError, TypeError): messagebox.showerror("Error", "Valores inválidos.")
     def add_column(self):
@@ -182,85 +498,127 @@ class App(tk.Tk):
         dialog = ElementDialog(self, title="Añadir Muro", is_wall=True);
         if dialog.result: self.add_element(Wall, dialog.result)
     def edit_element(self, element):
-        self._save_state_for_undo()
         is_wall = isinstance(element, Wall)
         dialog = ElementDialog(self, title=f"Editar {'Muro' if is_wall else 'Columna'}", element=element, is_wall=is_wall)
         if dialog.result:
-            for key, value in dialog.result.items(): setattr(element, key, value)
+            before = {key: getattr(element, key) for key in dialog.result}
+            element = self._update_element(element, dialog.result); self._record_undo({'kind': 'edit', 'element': element, 'before': before, 'after': dialog.result})
             self._update_inspector_panel(); self.update_and_redraw()
     def duplicate_element(self, element):
         is_wall = isinstance(element, Wall)
         dialog = ElementDialog(self, title=f"Duplicar {'Muro' if is_wall else 'Columna'}", element=element, is_wall=is_wall)
         if dialog.result: self.add_element(element.__class__, dialog.result)
     def delete_element(self, element):
-        self._save_state_for_undo()
         if messagebox.askyesno("Confirmar", f"¿Seguro que quieres borrar el elemento?"):
-            self.elements.remove(element)
+            element = self._own_element(element); self._record_undo({'kind': 'delete', 'element': element, 'position': self._remove_element(element)})
             if self.selected_element == element: self.selected_element = None
             self._update_inspector_panel(); self.update_and_redraw()
 
     def on_zoom(self, event):
         factor = 1.1 if event.delta > 0 else 1 / 1.1; new_zoom = self.zoom * factor
-        if 0.2 <= new_zoom <= 5.0:
+        if (0.2 <= new_zoom or factor > 1) and new_zoom <= 5.0:  # tras ajustar la vista a un edificio grande el zoom puede quedar bajo el mínimo
             mx, my = self.view_to_model(event.x, event.y); self.zoom = new_zoom; vx, vy = self.model_to_view(mx, my)
-            self.pan_offset_x -= (vx - event.x); self.pan_offset_y -= (vy - event.y); self.redraw_canvas()
+            self.pan_offset_x -= (vx - event.x); self.pan_offset_y -= (vy - event.y); self.scheduler.zoom(factor, event.x, event.y)
     def on_pan_start(self, event): self.pan_start_pos = (event.x, event.y); self.canvas.config(cursor="fleur")
     def on_pan_drag(self, event):
         if self.pan_start_pos:
             dx, dy = event.x - self.pan_start_pos[0], event.y - self.pan_start_pos[1]
-            self.pan_offset_x += dx; self.pan_offset_y += dy; self.pan_start_pos = (event.x, event.y); self.redraw_canvas()
+            self.pan_offset_x += dx; self.pan_offset_y += dy; self.pan_start_pos = (event.x, event.y); self.scheduler.pan(dx, dy)
     def on_mouse_down(self, event):
         mx, my = self.view_to_model(event.x, event.y)
-        hit_element = next((elem for elem in reversed(self.elements) if elem.is_hit(mx, my)), None)
+        hit_element = self.spatial_index.hit(mx, my)
         if self.selected_element != hit_element:
-             self.selected_element = hit_element; self.redraw_canvas(); self._update_inspector_panel()
-        if hit_element: self.drag_start_pos = (mx, my); self._save_state_for_undo()
+             self._set_selected(hit_element); self._update_inspector_panel()
+        if hit_element: self.drag_start_pos = (mx, my); self.drag_origin = (hit_element.x, hit_element.y)
     def on_mouse_move(self, event):
         if self.selected_element and self.drag_start_pos:
             new_mx, new_my=self.view_to_model(event.x,event.y); dx,dy=new_mx-self.drag_start_pos[0], new_my-self.drag_start_pos[1]
-            self.selected_element.move(dx, dy); self.drag_start_pos = (new_mx, new_my)
-            self._update_inspector_panel(); self.update_and_redraw()
-    def on_mouse_up(self, event): self.drag_start_pos, self.pan_start_pos = None, None; self.canvas.config(cursor="")
+            self._move_element(self.selected_element, dx, dy); self.drag_start_pos = (new_mx, new_my)
+            self._update_inspector_panel()
+            if not self.defer_recalc.get(): self.update_and_redraw()
+    def on_mouse_up(self, event):
+        if self.drag_start_pos and self.selected_element:
+            elem = self.selected_element; dx, dy = elem.x - self.drag_origin[0], elem.y - self.drag_origin[1]
+            if dx or dy: self._record_undo({'kind': 'move', 'element': elem, 'dx': dx, 'dy': dy})
+            if self.defer_recalc.get(): self.update_and_redraw()
+        self.drag_start_pos, self.drag_origin, self.pan_start_pos = None, None, None; self.canvas.config(cursor="")
     def update_cm(self):
-        self._save_state_for_undo()
-        try:
-            self.center_of_mass=(float(self.cm_x_var.get()), float(self.cm_y_var.get())); self.redraw_canvas()
-            self.update_eccentricity()
-        except ValueError: messagebox.showerror("Error", "Coordenadas del CM inválidas.")
-    def clear_configuration(self): self.undo_stack=[]; self.elements=[]; Column.count=0; Wall.count=0; self.selected_element=None; self.center_of_mass=(0.0,0.0); self.cm_x_var.set("0.0"); self.cm_y_var.set("0.0"); self.current_filepath=None; self.update_window_title(); self._update_inspector_panel(); self.update_and_redraw()
+        try: new_cm=(float(self.cm_x_var.get()), float(self.cm_y_var.get()))
+        except ValueError: messagebox.showerror("Error", "Coordenadas del CM inválidas."); return
+        if new_cm!=self.center_of_mass: self._record_undo({'kind': 'cm', 'before': self.center_of_mass, 'after': new_cm})
+        self._set_center_of_mass(new_cm)
+    def _set_center_of_mass(self, center_of_mass):
+        self.center_of_mass=center_of_mass; self.cm_x_var.set(str(center_of_mass[0])); self.cm_y_var.set(str(center_of_mass[1]))
+        self.draw_markers(); self.update_eccentricity()
+    def clear_configuration(self):
+        if self._busy(): return
+        Column.count=0; Wall.count=0; self._set_building(Building()); self.current_filepath=None; self.update_window_title()
     def save_configuration_as(self):
-        filepath=filedialog.asksaveasfilename(defaultextension=".json",filetypes=[("Archivos JSON","*.json")],title="Guardar como...")
+        if self._busy(): return False
+        filepath=filedialog.asksaveasfilename(defaultextension=".json",filetypes=FILE_TYPES,title="Guardar como...")
         if not filepath: return False
-        data_to_save={"center_of_mass":self.center_of_mass,"elements":[]}
-        for elem in self.elements: elem_data=elem.__dict__.copy();elem_data['type']=elem.__class__.__name__.lower();data_to_save["elements"].append(elem_data)
         try:
-            with open(filepath,'w') as f: json.dump(data_to_save, f, indent=4)
+            self._write_configuration(filepath)
             self.current_filepath=filepath; self.update_window_title(); return True
         except Exception as e: messagebox.showerror("Error al Guardar",f"No se pudo guardar:\n{e}"); return False
     def save_configuration(self):
+        if self._busy(): return
         if not self.current_filepath: self.save_configuration_as()
         else:
-            data_to_save={"center_of_mass":self.center_of_mass,"elements":[]}
-            for elem in self.elements: elem_data=elem.__dict__.copy();elem_data['type']=elem.__class__.__name__.lower();data_to_save["elements"].append(elem_data)
-            try:
-                with open(self.current_filepath,'w') as f: json.dump(data_to_save,f,indent=4)
+            try: self._write_configuration(self.current_filepath)
             except Exception as e: messagebox.showerror("Error al Guardar",f"No se pudo guardar:\n{e}")
+    def _write_configuration(self, filepath):
+        if filepath.lower().endswith(BINARY_MODEL_EXTENSION):
+            if len(self.building.storeys)>1: raise ValueError(f"El formato {BINARY_MODEL_EXTENSION} guarda un solo piso; use .json para edificios.")
+            save_binary_model(filepath, self.elements, self.center_of_mass); return
+        with open(filepath,'w') as f: json.dump(self.building.to_data(), f, indent=4)
     def load_configuration(self):
-        self.undo_stack=[]
-        filepath=filedialog.askopenfilename(filetypes=[("Archivos JSON","*.json")],title="Abrir configuración")
+        if self._busy(): return
+        self.history.clear()
+        filepath=filedialog.askopenfilename(filetypes=[("Modelos",f"*.json *{BINARY_MODEL_EXTENSION}")]+FILE_TYPES,title="Abrir configuración")
+        if filepath: self.open_configuration(filepath)
+    def open_configuration(self, filepath):
+        # Los ids se renumeran desde cero como en un modelo nuevo; si el archivo es inválido se conservan los contadores.
+        # En .crm las sumas de rigidez vienen en la cabecera, así que el CR se muestra antes de indexar los elementos.
+        counts=(Column.count,Wall.count); Column.count=Wall.count=0
+        try: building=load_building(filepath); building.recompute()
+        except Exception as e: Column.count,Wall.count=counts; messagebox.showerror("Error al cargar",f"Archivo inválido:\n{e}"); return
+        self._set_building(building, fit=True); self.current_filepath=filepath; self.update_window_title()
+    def import_plan(self):
+        if self._busy(): return
+        filepath=filedialog.askopenfilename(filetypes=[("Planos CAD"," ".join(f"*{ext}" for ext in IMPORT_EXTENSIONS)),("CSV","*.csv"),("DXF","*.dxf")],title="Importar plano")
+        if not filepath: return
+        dialog=ImportOptionsDialog(self, title="Opciones de importación")
+        if dialog.result: self.importer=PlanImport(self, filepath, dialog.result)
+    def analyze_load_cases(self):
+        # Evalúa todos los casos en todos los pisos; los coeficientes de cada piso se reutilizan mientras no cambie su geometría.
+        dialog=LoadCasesDialog(self, title="Casos de carga")
+        if not dialog.result: return
+        options=dialog.result; start=time.perf_counter(); tables=[]; lines=[]
+        for storey in self.building.storeys:
+            if not storey.elements: continue
+            try: engine=storey.lateral_engine()
+            except (ValueError, RuntimeError) as e: lines.append(f"{storey.name}: {e}"); continue
+            cases=standard_load_cases(options['base_shear'], storey.center_of_mass, storey.bounds(), options['levels'], options['centers_of_mass'], options['ratio'])
+            governing=engine.governing(cases); tables.append((storey, engine, cases))
+            for key, label in (('vx','Vx'),('vy','Vy')):
+                i=int(abs(governing[key]).argmax()); element=('M' if engine.kinds[i]==ElementArrays.WALL else 'C')+str(engine.ids[i])
+                lines.append(f"{storey.name}: {label} máx. {abs(governing[key][i]):.3f} en {element} ({cases[governing[key+'_case'][i]].name})")
+        elapsed=1000*(time.perf_counter()-start)
+        if not tables: messagebox.showinfo("Casos de carga", "\n".join(lines) or "No hay elementos."); return
+        summary=f"{len(tables[0][2])} casos por piso, {sum(len(engine) for _, engine, _ in tables)} elementos, {elapsed:.0f} ms\n\n"+"\n".join(lines)
+        if not messagebox.askyesno("Casos de carga", summary+"\n\n¿Guardar la tabla de cortantes por elemento (CSV)?"): return
+        filepath=filedialog.asksaveasfilename(defaultextension=".csv",filetypes=[("CSV","*.csv")],title="Guardar tabla de cortantes")
         if not filepath: return
         try:
-            with open(filepath,'r') as f: data=json.load(f)
-            self.clear_configuration()
-            cm=data.get("center_of_mass",[0.0,0.0]); self.center_of_mass=tuple(cm)
-            self.cm_x_var.set(str(cm[0])); self.cm_y_var.set(str(cm[1]))
-            for elem_data in data.get("elements",[]):
-                elem_type=elem_data.pop('type',None); elem_data.pop('id',None)
-                if elem_type=='column': self.elements.append(Column(**elem_data))
-                elif elem_type=='wall': self.elements.append(Wall(**elem_data))
-            self.current_filepath=filepath; self.update_window_title()
-            self.update_and_redraw(); self.fit_to_view()
-        except Exception as e: messagebox.showerror("Error al cargar",f"Archivo inválido:\n{e}")
+            with open(filepath,'w',newline='') as f:
+                writer=None
+                for storey, engine, cases in tables:
+                    for row in engine.shear_table(cases):
+                        row=dict(storey=storey.name, **row)
+                        if writer is None: writer=csv.DictWriter(f, fieldnames=list(row)); writer.writeheader()
+                        writer.writerow(row)
+        except Exception as e: messagebox.showerror("Error al Guardar",f"No se pudo guardar:\n{e}")
     def update_window_title(self):
         if self.current_filepath: self.title(f"Calculadora de CR - {os.path.basename(self.current_filepath)}")
         else: self.title("Calculadora de CR - [Sin Título]")
@@ -272,8 +630,14 @@ class App(tk.Tk):
     def get_canvas_center(self): return self.canvas.winfo_width()/2, self.canvas.winfo_height()/2
     def model_to_view(self, mx, my): cx,cy=self.get_canvas_center();scale=self.zoom*PIXELS_PER_METER; return cx+self.pan_offset_x+mx*scale, cy+self.pan_offset_y-my*scale
     def view_to_model(self, vx, vy): cx,cy=self.get_canvas_center();scale=self.zoom*PIXELS_PER_METER; return (vx-cx-self.pan_offset_x)/scale, -(vy-cy-self.pan_offset_y)/scale
-    def redraw_canvas(self, event=None): self.canvas.delete("all"); self.draw_grid_and_rulers(); self.draw_elements(); self.draw_markers()
+    # --- Renderizado retenido: cada elemento conserva sus ítems del canvas entre cuadros ---
+    def redraw_canvas(self, event=None):
+        self.scheduler.discard_render(); self.canvas.delete("all"); self.canvas_items = {}; self.marker_items = None; self.drawn_rect = None
+        self.lod_band = self._lod_band(); self.lod_scale = 2.0 ** self.lod_band
+        self.draw_grid_and_rulers(); self.draw_aggregates(); self.draw_elements(); self.draw_markers()
+    def _lod_band(self): return math.floor(math.log2(self.zoom * PIXELS_PER_METER))
     def draw_grid_and_rulers(self):
+        self.canvas.delete("grid", "rulers")
         scale=self.zoom*PIXELS_PER_METER; potential_steps=[0.1,0.2,0.5,1,2,5,10,20,50,100]; model_step=1.0
         for step in potential_steps:
             if step*scale > GRID_MIN_PIXEL_SPACING: model_step=step; break
@@ -284,27 +648,131 @@ class App(tk.Tk):
         for mx in [i*model_step for i in range(round(start_x/model_step), round(mx_max/model_step)+1)]:
             vx,_=self.model_to_view(mx,0); is_origin=abs(mx)<1e-9; color,width=("gray50",2) if is_origin else (GRID_COLOR,1)
             self.canvas.create_line(vx, vy_min, vx, vy_max, fill=color, width=width, tags="grid")
-            self.canvas.create_text(vx, 15, text=f"{mx:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",9))
-            if not is_origin: self.canvas.create_text(vx, vy_origin+10, text=f"{mx:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",8), anchor="n")
+            self.canvas.create_text(vx, 15, text=f"{mx:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",9), tags="rulers")
+            if not is_origin: self.canvas.create_text(vx, vy_origin+10, text=f"{mx:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",8), anchor="n", tags="rulers")
         start_y=math.floor(my_min/model_step)*model_step
         for my in [i*model_step for i in range(round(start_y/model_step), round(my_max/model_step)+1)]:
             _,vy=self.model_to_view(0,my); is_origin=abs(my)<1e-9; color,width=("gray50",2) if is_origin else (GRID_COLOR,1)
             self.canvas.create_line(vx_min, vy, vx_max, vy, fill=color, width=width, tags="grid")
             if not is_origin:
-                self.canvas.create_text(20,vy, text=f"{my:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",9))
-                self.canvas.create_text(vx_origin-10,vy, text=f"{my:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",8), anchor="e")
-        self.canvas.create_rectangle(0,0,vx_max,30,fill=RULER_BG_COLOR,outline=""); self.canvas.create_rectangle(0,0,40,vy_max,fill=RULER_BG_COLOR,outline=""); self.canvas.tag_lower("grid")
+                self.canvas.create_text(20,vy, text=f"{my:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",9), tags="rulers")
+                self.canvas.create_text(vx_origin-10,vy, text=f"{my:.{num_decimals}f}", fill=RULER_FG_COLOR, font=("Arial",8), anchor="e", tags="rulers")
+        self.canvas.create_rectangle(0,0,vx_max,30,fill=RULER_BG_COLOR,outline="",tags="rulers"); self.canvas.create_rectangle(0,0,40,vy_max,fill=RULER_BG_COLOR,outline="",tags="rulers")
+        self.canvas.tag_lower("rulers"); self.canvas.tag_lower("grid")
+    def visible_model_rect(self):
+        mx_min,my_max=self.view_to_model(0,0); mx_max,my_min=self.view_to_model(self.canvas.winfo_width(),self.canvas.winfo_height())
+        return mx_min,my_min,mx_max,my_max
+    def draw_aggregates(self):
+        # Los elementos de menos de LOD_AGGREGATE_PIXELS se dibujan como un raster de densidad: un rectángulo por celda
+        # ocupada. Si hay agrupados, lod_cells guarda {celda: [cantidad, ítem]} y lod_elements los demás elementos (si no,
+        # ambos son None); _lod_add/_lod_discard los mantienen al día en cada cambio del modelo.
+        cells,large=aggregate_small_elements(self.elements, LOD_AGGREGATE_PIXELS/self.lod_scale, LOD_CELL_PIXELS/self.lod_scale)
+        self.lod_elements,self.lod_cells=(dict.fromkeys(large),{}) if cells else (None,None)
+        for key,count in cells.items(): self.lod_cells[key]=[count,None]; self._draw_cell(key, lower=False)
+    def _draw_cell(self, key, lower=True):
+        # Dibuja, recolorea o borra el rectángulo de una celda; una celda nueva se baja debajo de los elementos.
+        if not self.lod_cells or key not in self.lod_cells: return
+        count,item=self.lod_cells[key]
+        if count==0:
+            if item is not None: self.canvas.delete(item)
+            del self.lod_cells[key]; return
+        color=AGGREGATE_COLORS[min(count.bit_length()-1, len(AGGREGATE_COLORS)-1)]
+        if item is not None: self.canvas.itemconfig(item, fill=color); return
+        cell=LOD_CELL_PIXELS/self.lod_scale; i,j=key
+        item=self.lod_cells[key][1]=self.canvas.create_rectangle(*self.model_to_view(i*cell,j*cell), *self.model_to_view((i+1)*cell,(j+1)*cell), fill=color, outline="", tags=("model","aggregate"))
+        if lower: self.canvas.tag_lower(item, "model")
+    def _lod_cell(self, elem): cell=LOD_CELL_PIXELS/self.lod_scale; return math.floor(elem.x/cell), math.floor(elem.y/cell)
+    def _lod_add(self, elem):
+        # Clasifica un elemento nuevo o modificado mientras hay agrupados: suma en su celda (que se redibuja en el próximo
+        # cuadro) o entra en lod_elements para dibujarse aparte.
+        if self.lod_cells is None: return
+        x0,y0,x1,y1=elem.get_bounding_box()
+        if max(x1-x0,y1-y0)>=LOD_AGGREGATE_PIXELS/self.lod_scale: self.lod_elements[elem]=None; return
+        key=self._lod_cell(elem); self.lod_cells.setdefault(key,[0,None])[0]+=1; self.scheduler.touch_cell(key)
+    def _lod_discard(self, elem):
+        # Inverso de _lod_add, antes de borrar o modificar el elemento (con su geometría todavía sin cambiar).
+        if self.lod_cells is None: return
+        if elem in self.lod_elements: del self.lod_elements[elem]; return
+        key=self._lod_cell(elem)
+        if key in self.lod_cells: self.lod_cells[key][0]-=1; self.scheduler.touch_cell(key)
+    def _aggregated(self, elem): return self.lod_elements is not None and elem not in self.lod_elements and elem!=self.selected_element
     def draw_elements(self):
-        for elem in self.elements: elem.draw(self.canvas, self, (elem==self.selected_element))
+        # Crea ítems solo para los elementos visibles que aún no los tienen; los existentes se reutilizan. Todo lo que toca
+        # drawn_rect (lo visible en el cuadro anterior) ya tiene ítems, así que tras un pan o zoom solo se consultan en el
+        # índice espacial las franjas recién expuestas. Los elementos agrupados los representa el raster de densidad, salvo el
+        # seleccionado, que no está en lod_elements y se añade aparte para que no pierda su resaltado.
+        created=False; visible=self.visible_model_rect(); previous,self.drawn_rect=self.drawn_rect,visible
+        if previous is None and self.lod_elements is not None:
+            candidates=[elem for elem in self.lod_elements if self._intersects(elem, visible)]
+            if self.selected_element is not None and self.selected_element not in self.lod_elements and self._intersects(self.selected_element, visible): candidates.append(self.selected_element)
+        else: candidates=[elem for rect in self._exposed(visible, previous) for elem in self.spatial_index.query(*rect) if not self._aggregated(elem)]
+        for elem in candidates:
+            if elem not in self.canvas_items: self.canvas_items[elem]=self._create_element_items(elem); created=True
+        if created and self.marker_items: self.canvas.tag_raise("marker")
+    @staticmethod
+    def _exposed(rect, previous):
+        # Partes de rect que no cubre previous (hasta cuatro franjas); rect completo si no se solapan.
+        x0,y0,x1,y1=rect
+        if previous is None or previous[0]>x1 or previous[2]<x0 or previous[1]>y1 or previous[3]<y0: return [rect]
+        px0,py0,px1,py1=previous; mx0,mx1=max(x0,px0),min(x1,px1)
+        strips=[(x0,y0,px0,y1)] if x0<px0 else []
+        if x1>px1: strips.append((px1,y0,x1,y1))
+        if y0<py0: strips.append((mx0,y0,mx1,py0))
+        if y1>py1: strips.append((mx0,py1,mx1,y1))
+        return strips
+    @staticmethod
+    def _intersects(elem, rect): x0,y0,x1,y1=elem.get_bounding_box(); return x0<=rect[2] and x1>=rect[0] and y0<=rect[3] and y1>=rect[1]
+    def _element_style(self, elem): return (COLUMN_COLOR, "C", "white") if isinstance(elem, Column) else (WALL_COLOR, "M", "black")
+    def _element_view_box(self, elem): x0,y0,x1,y1=elem.get_bounding_box(); return (*self.model_to_view(x0,y0), *self.model_to_view(x1,y1))
+    def _create_element_items(self, elem):
+        color,prefix,label_color=self._element_style(elem)
+        outline_color,outline_width=(SELECTION_COLOR,3) if elem==self.selected_element else (color,1)
+        rect=self.canvas.create_rectangle(*self._element_view_box(elem), fill=color, outline=outline_color, width=outline_width, tags="model")
+        text=self.canvas.create_text(*self.model_to_view(elem.x,elem.y), text=f"{prefix}{elem.id}", fill=label_color, font=("Arial",8), tags="model") if self._has_label(elem) else None
+        return rect,text
+    def _has_label(self, elem): x0,y0,x1,y1=elem.get_bounding_box(); return max(x1-x0,y1-y0)*self.lod_scale>=LOD_LABEL_PIXELS
+    def _refresh_element(self, elem):
+        items=self.canvas_items.get(elem)
+        if items and (items[1] is not None)==self._has_label(elem) and not self._aggregated(elem):
+            rect,text=items; self.canvas.coords(rect, *self._element_view_box(elem))
+            if text: self.canvas.coords(text, *self.model_to_view(elem.x,elem.y))
+            return
+        if items: self.canvas.delete(*filter(None, self.canvas_items.pop(elem)))
+        if self._intersects(elem, self.visible_model_rect()) and not self._aggregated(elem):
+            self.canvas_items[elem]=self._create_element_items(elem)
+            if self.marker_items: self.canvas.tag_raise("marker")
+    def _forget_element(self, elem):
+        items=self.canvas_items.pop(elem,None)
+        if items: self.canvas.delete(*filter(None, items))
+    def _set_selected(self, elem):
+        previous,self.selected_element=self.selected_element,elem
+        for item_elem,is_selected in ((previous,False),(elem,True)):
+            items=self.canvas_items.get(item_elem) if item_elem is not None else None
+            if items:
+                color=self._element_style(item_elem)[0]
+                self.canvas.itemconfig(items[0], outline=SELECTION_COLOR if is_selected else color, width=3 if is_selected else 1)
+            elif is_selected and item_elem is not None: self._refresh_element(item_elem)  # un elemento agrupado se dibuja al seleccionarlo
+    def _apply_view_transform(self, scale, dx, dy):
+        # Pan y zoom son afines en coordenadas de vista (v' = scale·v + d): se mueven los ítems existentes sin recrearlos.
+        # Al cambiar de banda de detalle se reconstruye todo, porque cambian las etiquetas y los agrupados.
+        if self._lod_band() != self.lod_band: self.redraw_canvas(); return
+        if scale != 1.0: self.canvas.scale("model", 0, 0, scale, scale)
+        self.canvas.move("model", dx, dy); self.draw_grid_and_rulers(); self.draw_elements()
     def draw_markers(self):
+        if self.marker_items is None:
+            marker=("model","marker")
+            self.marker_items=(self.canvas.create_line(0,0,0,0,fill=CR_COLOR,width=2,tags=marker), self.canvas.create_line(0,0,0,0,fill=CR_COLOR,width=2,tags=marker),
+                self.canvas.create_text(0,0, text="CR", anchor="w", fill=CR_COLOR, font=("Arial",10,"bold"), tags=marker),
+                self.canvas.create_oval(0,0,0,0, outline=CM_COLOR, width=2, tags=marker), self.canvas.create_text(0,0, text="CM", anchor="w", fill=CM_COLOR, font=("Arial",10,"bold"), tags=marker))
+        cr_h,cr_v,cr_text,cm_oval,cm_text=self.marker_items
+        for items,center in (((cr_h,cr_v,cr_text),self.center_of_rigidity),((cm_oval,cm_text),self.center_of_mass)):
+            for item in items: self.canvas.itemconfig(item, state="normal" if center else "hidden")
         if self.center_of_rigidity:
             vx,vy=self.model_to_view(*self.center_of_rigidity); size=12
-            self.canvas.create_line(vx-size,vy,vx+size,vy,fill=CR_COLOR,width=2); self.canvas.create_line(vx,vy-size,vx,vy+size,fill=CR_COLOR,width=2)
-            self.canvas.create_text(vx+size+2,vy, text="CR", anchor="w", fill=CR_COLOR, font=("Arial",10,"bold"))
+            self.canvas.coords(cr_h,vx-size,vy,vx+size,vy); self.canvas.coords(cr_v,vx,vy-size,vx,vy+size); self.canvas.coords(cr_text,vx+size+2,vy)
         if self.center_of_mass:
             vx,vy=self.model_to_view(*self.center_of_mass); size=10
-            self.canvas.create_oval(vx-size,vy-size,vx+size,vy+size, outline=CM_COLOR, width=2)
-            self.canvas.create_text(vx+size+2,vy, text="CM", anchor="w", fill=CM_COLOR, font=("Arial",10,"bold"))
+            self.canvas.coords(cm_oval,vx-size,vy-size,vx+size,vy+size); self.canvas.coords(cm_text,vx+size+2,vy)
     def update_calculations(self):
         if not self.elements: 
             self.center_of_rigidity=None;
@@ -312,32 +780,32 @@ class App(tk.Tk):
             self.cr_y_label.config(text="Y: N/A");
             self.update_eccentricity();
             return
-        sum_kx,sum_ky=sum(e.get_rigidity_x() for e in self.elements), sum(e.get_rigidity_y() for e in self.elements)
-        if sum_ky==0 or sum_kx==0:
+        if self.rigidity.needs_resync(): self.rigidity.resync(self.elements)
+        center=self.rigidity.center()
+        if center is None:
             self.center_of_rigidity=None;
             self.cr_x_label.config(text="X: Inestable");
             self.cr_y_label.config(text="Y: Inestable");
             self.update_eccentricity(); 
             return
-        sum_kxy,sum_kyx=sum(e.get_rigidity_y()*e.x for e in self.elements), sum(e.get_rigidity_x()*e.y for e in self.elements)
-        self.center_of_rigidity=(sum_kxy/sum_ky, sum_kyx/sum_kx)
+        self.center_of_rigidity=center
         self.cr_x_label.config(text=f"X: {self.center_of_rigidity[0]:.3f}"); self.cr_y_label.config(text=f"Y: {self.center_of_rigidity[1]:.3f}")
         self.update_eccentricity()
     def show_context_menu(self, event):
         mx,my=self.view_to_model(event.x,event.y)
-        hit_element=next((elem for elem in reversed(self.elements) if elem.is_hit(mx,my)), None)
+        hit_element=self.spatial_index.hit(mx,my)
         if hit_element:
             if self.selected_element != hit_element:
-                self.selected_element=hit_element; self.redraw_canvas(); self._update_inspector_panel()
+                self._set_selected(hit_element); self._update_inspector_panel()
             menu=tk.Menu(self,tearoff=0)
             menu.add_command(label="Editar", command=lambda: self.edit_element(hit_element))
             menu.add_command(label="Duplicar", command=lambda: self.duplicate_element(hit_element))
+            menu.add_command(label="Variable de diseño...", command=lambda: self.add_design_variable(hit_element))
             menu.add_separator(); menu.add_command(label="Borrar", command=lambda: self.delete_element(hit_element))
             menu.post(event.x_root,event.y_root)
     def fit_to_view(self):
         if not self.elements: self.pan_offset_x,self.pan_offset_y,self.zoom=0,0,1.0; self.redraw_canvas(); return
-        min_x=min(e.get_bounding_box()[0] for e in self.elements); min_y=min(e.get_bounding_box()[1] for e in self.elements)
-        max_x=max(e.get_bounding_box()[2] for e in self.elements); max_y=max(e.get_bounding_box()[3] for e in self.elements)
+        min_x,min_y,max_x,max_y=self.storey.bounds()
         margin=max((max_x-min_x)*0.1, (max_y-min_y)*0.1, 5)
         min_x,min_y,max_x,max_y=min_x-margin,min_y-margin,max_x+margin,max_y+margin
         model_width,model_height=max_x-min_x,max_y-min_y
@@ -347,7 +815,7 @@ class App(tk.Tk):
         model_cx,model_cy=(min_x+max_x)/2,(min_y+max_y)/2
         view_cx,view_cy=self.model_to_view(model_cx,model_cy); canvas_cx,canvas_cy=self.get_canvas_center()
         self.pan_offset_x-=(view_cx-canvas_cx); self.pan_offset_y-=(view_cy-canvas_cy); self.redraw_canvas()
-    def update_and_redraw(self): self.update_calculations(); self.redraw_canvas()
+    def update_and_redraw(self): self.scheduler.request_recalc()
 
 class ElementDialog(simpledialog.Dialog):
     def __init__(self, parent, title, element=None, is_wall=False): self.element,self.is_wall=element,is_wall; super().__init__(parent,title)
@@ -374,6 +842,65 @@ class ElementDialog(simpledialog.Dialog):
             if self.is_wall: self.result["orientation"]=self.orientation_var.get()
         except ValueError: messagebox.showerror("Entrada inválida","Todos los campos deben ser números.",parent=self); self.result=None
 
+class DesignVariableDialog(simpledialog.Dialog):
+    def __init__(self, parent, title, element): self.element=element; super().__init__(parent,title)
+    def body(self, master):
+        attributes=OPTIMIZABLE_ATTRIBUTES[Wall if isinstance(self.element,Wall) else Column]
+        ttk.Label(master,text="Atributo:").grid(row=0,column=0,sticky="w",padx=5,pady=2)
+        self.attribute_var=tk.StringVar(value=attributes[0])
+        combo=ttk.Combobox(master,textvariable=self.attribute_var,values=attributes,state="readonly"); combo.grid(row=0,column=1,sticky="ew",padx=5,pady=2)
+        combo.bind("<<ComboboxSelected>>", lambda e: self._set_defaults())
+        self.vars={key: tk.StringVar() for key in ("low","high","step")}
+        for i,(label,key) in enumerate([("Mínimo","low"),("Máximo","high"),("Paso (0 = continuo)","step")],1):
+            ttk.Label(master,text=f"{label}:").grid(row=i,column=0,sticky="w",padx=5,pady=2); ttk.Entry(master,textvariable=self.vars[key]).grid(row=i,column=1,sticky="ew",padx=5,pady=2)
+        self._set_defaults(); return combo
+    def _set_defaults(self):
+        # Por defecto: ±2 m alrededor de la posición actual o ±50 % de la dimensión actual.
+        value=getattr(self.element,self.attribute_var.get())
+        low,high=(value-2,value+2) if self.attribute_var.get() in ('x','y') else (value*0.5,value*1.5)
+        self.vars["low"].set(f"{low:g}"); self.vars["high"].set(f"{high:g}"); self.vars["step"].set("0.1")
+    def apply(self):
+        try: self.result=DesignVariable(self.element,self.attribute_var.get(),*(float(self.vars[key].get()) for key in ("low","high","step")))
+        except ValueError as e: messagebox.showerror("Entrada inválida",str(e),parent=self); self.result=None
+
+class ImportOptionsDialog(simpledialog.Dialog):
+    def body(self, master):
+        fields=[("Escala (m por unidad)","scale",1.0),("Espesor de muro por defecto (m)","wall_thickness",DEFAULT_WALL_THICKNESS),("Columna por defecto (m, DXF)","column_size",DEFAULT_COLUMN_SIZE)]
+        self.vars={}
+        for i,(label,key,default) in enumerate(fields):
+            ttk.Label(master,text=f"{label}:").grid(row=i,column=0,sticky="w",padx=5,pady=2)
+            self.vars[key]=tk.StringVar(value=str(default)); ttk.Entry(master,textvariable=self.vars[key]).grid(row=i,column=1,sticky="ew",padx=5,pady=2)
+    def apply(self):
+        try:
+            self.result={key: float(var.get()) for key,var in self.vars.items()}
+            if min(self.result.values())<=0: raise ValueError
+        except ValueError: messagebox.showerror("Entrada inválida","Los valores deben ser números positivos.",parent=self); self.result=None
+
+class LoadCasesDialog(simpledialog.Dialog):
+    def body(self, master):
+        fields=[("Cortante basal Vx","vx","100"),("Cortante basal Vy","vy","100"),("Excentricidad accidental","ratio",str(ACCIDENTAL_ECCENTRICITY)),
+                ("Niveles de fuerza (ej. 0.5, 1)","levels","1"),("CM alternativos (ej. 5,3; 8,2)","centers","")]
+        self.vars={}
+        for i,(label,key,default) in enumerate(fields):
+            ttk.Label(master,text=f"{label}:").grid(row=i,column=0,sticky="w",padx=5,pady=2)
+            self.vars[key]=tk.StringVar(value=default); ttk.Entry(master,textvariable=self.vars[key]).grid(row=i,column=1,sticky="ew",padx=5,pady=2)
+    def apply(self):
+        try:
+            centers=[tuple(float(value) for value in pair.split(",")) for pair in self.vars["centers"].get().split(";") if pair.strip()]
+            if any(len(center)!=2 for center in centers): raise ValueError
+            self.result={"base_shear":(float(self.vars["vx"].get()),float(self.vars["vy"].get())),"ratio":float(self.vars["ratio"].get()),
+                         "levels":[float(value) for value in self.vars["levels"].get().replace(";",",").split(",") if value.strip()] or [1.0],"centers_of_mass":centers}
+        except ValueError: messagebox.showerror("Entrada inválida","Revise los valores: números, niveles separados por comas y CM como x,y separados por ';'.",parent=self); self.result=None
+
+class OptimizeDialog(simpledialog.Dialog):
+    def body(self, master):
+        self.vars={"wx":tk.StringVar(value="1.0"),"wy":tk.StringVar(value="1.0"),"samples":tk.StringVar(value="1000000")}
+        for i,(label,key) in enumerate([("Peso |ex|","wx"),("Peso |ey|","wy"),("Candidatos","samples")]):
+            ttk.Label(master,text=f"{label}:").grid(row=i,column=0,sticky="w",padx=5,pady=2); ttk.Entry(master,textvariable=self.vars[key]).grid(row=i,column=1,sticky="ew",padx=5,pady=2)
+    def apply(self):
+        try: self.result={"weights":(float(self.vars["wx"].get()),float(self.vars["wy"].get())),"samples":max(1,int(self.vars["samples"].get()))}
+        except ValueError: messagebox.showerror("Entrada inválida","Los pesos deben ser números y los candidatos un entero.",parent=self); self.result=None
+
 if __name__ == "__main__":
     Column.count, Wall.count = 0, 0
     app = App()
@@ -0,0 +1,34 @@
+import json
+import os
+import pytest
+
+pytest.importorskip("numpy")
+import centros_batch
+from centros_core import Building, load_building
+
+STOREY = {'center_of_mass': [1.0, 2.0], 'elements': [
+    {'type': 'column', 'x': 0.0, 'y': 0.0, 'width': 0.4, 'height': 0.6},
+    {'type': 'wall', 'x': 3.0, 'y': 1.0, 'length': 4.0, 'thickness': 0.2, 'orientation': 'H'},
+    {'type': 'wall', 'x': -2.0, 'y': 2.0, 'length': 3.0, 'thickness': 0.25, 'orientation': 'V'}]}
+
+def write_json(path, data):
+    with open(path, 'w') as f: json.dump(data, f)
+    return str(path)
+
+def run_batch(capsys, argv):
+    rc = centros_batch.main(argv + ['--workers', '1']); return rc, capsys.readouterr().out
+
+def test_convert_round_trips_single_storey(tmp_path, capsys):
+    source = write_json(tmp_path / "plan.json", STOREY)
+    assert run_batch(capsys, [source, '--convert'])[0] == 0
+    os.remove(source); assert run_batch(capsys, [str(tmp_path / "plan.crm"), '--convert'])[0] == 0
+    original, converted = Building.from_data(STOREY).storeys[0], load_building(source).storeys[0]
+    assert converted.center_of_mass == original.center_of_mass and converted.center_of_rigidity() == pytest.approx(original.center_of_rigidity())
+
+def test_convert_rejects_multi_storey(tmp_path, capsys):
+    building = {'storeys': [dict(STOREY, name="Piso 1"), dict(STOREY, name="Piso 2", elements=STOREY['elements'][:2])]}
+    source = write_json(tmp_path / "edificio.json", building)
+    rc, out = run_batch(capsys, [source, '--convert'])
+    assert rc == 1 and "un solo piso" in out and not os.path.exists(tmp_path / "edificio.crm")
+    rc, out = run_batch(capsys, [source])
+    assert rc == 0 and [line.split(',')[1] for line in out.splitlines()[1:]] == ["Piso 1", "Piso 2"]
@@ -0,0 +1,33 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from centros_core import Column, ElementArrays, element_to_dict, RigiditySums, load_building, save_binary_model, read_binary_header
+
+def make_model(count):
+    data = [{'type': 'wall', 'x': i * 0.5, 'y': (i % 7) * 1.0, 'length': 2.0 + i % 3, 'thickness': 0.2, 'orientation': 'H' if i % 2 else 'V'} for i in range(count)]
+    return ElementArrays.from_data(data)
+
+def test_save_over_open_model(tmp_path):
+    # Borrar, guardar sobre el mismo .crm y deshacer no debe leer registros de un archivo ya reescrito.
+    path = str(tmp_path / "plan.crm"); save_binary_model(path, make_model(6000), (1.0, 2.0))
+    elements = load_building(path).storeys[0].elements; assert elements.mapped_file()
+    removed = [elements.view(row) for row in range(0, 4000, 2)]
+    for view in removed: elements.remove(view)
+    save_binary_model(path, elements, (1.0, 2.0))
+    for view in removed: elements.restore(view)
+    assert len(elements) == 6000 and [view.x for view in removed[:3]] == [0.0, 1.0, 2.0]
+    saved = load_building(path).storeys[0]
+    assert read_binary_header(path)['count'] == len(saved.elements) == 4000
+    assert saved.center_of_rigidity() == pytest.approx(RigiditySums(saved.elements.to_elements()).center())
+
+def test_save_to_other_path_keeps_mapping(tmp_path):
+    path = str(tmp_path / "plan.crm"); save_binary_model(path, make_model(100), (0.0, 0.0))
+    elements = load_building(path).storeys[0].elements
+    save_binary_model(str(tmp_path / "copia.crm"), elements, (0.0, 0.0))
+    assert elements.mapped_file() and len(load_building(str(tmp_path / "copia.crm")).storeys[0].elements) == 100
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_views_and_elements_have_no_instance_dict():
+    elements = make_model(4); elements.append(Column(1.0, 2.0, 0.3, 0.4))
+    assert not any(hasattr(view, '__dict__') for view in elements) and not any(hasattr(elem, '__dict__') for elem in elements.to_elements())
+    assert [element_to_dict(elem) for elem in elements.to_elements()] == [element_to_dict(view) for view in elements]
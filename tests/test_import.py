@@ -0,0 +1,28 @@
+import io
+import pytest
+from centros_import import ImportStats, iter_csv_elements, iter_dxf_elements
+
+def dxf(*entities, base=(0, 0)):
+    # Bloque "COL" de 0.4 x 0.6 con el punto base en una esquina (dibujado a partir de base), seguido de las entidades dadas.
+    pairs = [(0, 'SECTION'), (2, 'BLOCKS'), (0, 'BLOCK'), (2, 'COL'), (10, base[0]), (20, base[1]), (0, 'LWPOLYLINE'), (70, 1)]
+    pairs += [(code, value) for x, y in ((0, 0), (0.4, 0), (0.4, 0.6), (0, 0.6)) for code, value in ((10, base[0] + x), (20, base[1] + y))]
+    pairs += [(0, 'ENDBLK'), (0, 'ENDSEC'), (0, 'SECTION'), (2, 'ENTITIES')] + [pair for entity in entities for pair in entity] + [(0, 'ENDSEC'), (0, 'EOF')]
+    return io.BytesIO("".join(f"{code}\n{value}\n" for code, value in pairs).encode())
+
+def insert(x, y, angle): return [(0, 'INSERT'), (2, 'COL'), (10, x), (20, y), (50, angle)]
+
+def test_csv_with_utf8_bom():
+    stats = ImportStats(); data = "\ufefftype,x,y,width,height\ncolumn,1,2,0.3,0.5\n".encode('utf-8')
+    assert list(iter_csv_elements(io.BytesIO(data), stats)) == [{'type': 'column', 'x': 1.0, 'y': 2.0, 'width': 0.3, 'height': 0.5}]
+    assert stats.skipped == 0
+
+@pytest.mark.parametrize("angle, center, size", [(0, (10.2, 5.3), (0.4, 0.6)), (90, (9.7, 5.2), (0.6, 0.4)),
+                                                 (180, (9.8, 4.7), (0.4, 0.6)), (270, (10.3, 4.8), (0.6, 0.4)), (-90, (10.3, 4.8), (0.6, 0.4))])
+@pytest.mark.parametrize("base", [(0, 0), (100, -50)])
+def test_insert_rotation(angle, center, size, base):
+    column, = iter_dxf_elements(dxf(insert(10, 5, angle), base=base), ImportStats())
+    assert (column['x'], column['y']) == pytest.approx(center) and (column['width'], column['height']) == pytest.approx(size)
+
+def test_oblique_insert_is_skipped():
+    stats = ImportStats()
+    assert list(iter_dxf_elements(dxf(insert(10, 5, 45), insert(0, 0, 0)), stats)) and stats.skipped == 1 and stats.elements == 1
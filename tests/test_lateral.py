@@ -0,0 +1,49 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from centros_core import ElementArrays, LateralLoadEngine, LoadCase, Storey, elements_from_data, model_bounds, standard_load_cases
+
+def plan_data(count=400, seed=3):
+    # Planta asimétrica de columnas y muros en ambas orientaciones.
+    rng = np.random.default_rng(seed); data = []
+    for i in range(count):
+        x, y = float(rng.uniform(0, 30) ** 1.2), float(rng.uniform(0, 20))
+        if i % 3: data.append({'type': 'wall', 'x': x, 'y': y, 'length': float(rng.uniform(1, 6)), 'thickness': 0.2, 'orientation': 'H' if i % 2 else 'V'})
+        else: data.append({'type': 'column', 'x': x, 'y': y, 'width': float(rng.uniform(0.3, 0.8)), 'height': float(rng.uniform(0.3, 0.8))})
+    return data
+
+def load_cases(elements, seed=5):
+    # Casos normativos con varios niveles y CM alternativos, más casos oblicuos al azar para poner a prueba la envolvente.
+    rng = np.random.default_rng(seed)
+    cases = standard_load_cases((120.0, 80.0), (14.0, 9.0), model_bounds(elements), levels=(0.5, 1.0), centers_of_mass=[(10.0, 12.0), (20.0, 5.0)])
+    return cases + [LoadCase(f"R{i}", *rng.uniform(-100, 100, 2), *rng.uniform(0, 30, 2)) for i in range(20)]
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_equilibrium_per_case(compact):
+    elements = elements_from_data(plan_data(), compact=compact); engine = LateralLoadEngine(elements); cases = load_cases(elements)
+    fx, fy = engine.shears(cases); loads = engine.case_matrix(cases)
+    dx, dy = engine.x - engine.center_of_rigidity[0], engine.y - engine.center_of_rigidity[1]
+    assert fx.sum(axis=1) == pytest.approx([case.vx for case in cases], abs=1e-9)
+    assert fy.sum(axis=1) == pytest.approx([case.vy for case in cases], abs=1e-9)
+    assert fy @ dx - fx @ dy == pytest.approx(loads[:, 2], abs=1e-7)
+    assert loads[:, 2] == pytest.approx([(case.cm_x - engine.center_of_rigidity[0]) * case.vy - (case.cm_y - engine.center_of_rigidity[1]) * case.vx for case in cases])
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_governing_matches_brute_force(compact):
+    elements = elements_from_data(plan_data(), compact=compact); engine = LateralLoadEngine(elements); cases = load_cases(elements)
+    governing = engine.governing(cases); columns = np.arange(len(engine))
+    for key, full in zip(('vx', 'vy'), engine.shears(cases)):
+        assert np.abs(governing[key]) == pytest.approx(np.abs(full).max(axis=0))
+        assert governing[key] == pytest.approx(full[governing[key + '_case'], columns])
+
+def test_array_and_list_engines_agree():
+    data = plan_data(); by_list, by_arrays = LateralLoadEngine(elements_from_data(data, compact=False)), LateralLoadEngine(ElementArrays.from_data(data))
+    assert by_arrays.center_of_rigidity == pytest.approx(by_list.center_of_rigidity)
+    for name in ('direct_x', 'direct_y', 'torsion_x', 'torsion_y'): assert getattr(by_arrays, name) == pytest.approx(getattr(by_list, name))
+
+def test_storey_engine_cache_follows_geometry():
+    storey = Storey("Piso 1", elements_from_data(plan_data(50), compact=False)); storey.recompute()
+    engine = storey.lateral_engine(); assert storey.lateral_engine() is engine
+    elem = storey.elements[0]; elem.x += 2.0; storey.rigidity.move(elem, 2.0, 0.0)
+    moved = storey.lateral_engine(); assert moved is not engine and moved.x[0] == elem.x
+    assert moved.center_of_rigidity == pytest.approx(storey.center_of_rigidity())
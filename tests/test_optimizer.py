@@ -0,0 +1,30 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("numpy")
+from centros_core import Column, Wall, DesignVariable, RigiditySums, optimize_layout
+
+def plan(walls):
+    elements = [Column(0, 0, 0.4, 0.4), Column(10, 0, 0.4, 0.4), Column(0, 8, 0.4, 0.4), Column(10, 8, 0.4, 0.4)]
+    return elements + [Wall(1 + i, 1 + (i % 5), 2.0, 0.2, 'H' if i % 2 else 'V') for i in range(walls)]
+
+def test_result_matches_exact_recomputation():
+    elements = plan(3); variables = [DesignVariable(elements[-1], 'x', 0, 10, 0.1), DesignVariable(elements[-2], 'length', 1, 4, 0.1)]
+    result = optimize_layout(elements, (5.0, 4.0), variables, samples=20000, workers=1, seed=1)
+    for elem, changes in result['changes'].items():
+        for key, value in changes.items(): setattr(elem, key, value)
+    center = RigiditySums(elements).center()
+    assert (result['ex'], result['ey']) == pytest.approx((center[0] - 5.0, center[1] - 4.0))
+
+def test_many_variables_stay_within_budget():
+    # 10 muros x 4 atributos: una rejilla de 2 niveles tendría 2^40 puntos.
+    elements = plan(10); walls = elements[4:]
+    variables = [DesignVariable(wall, attribute, low, high, 0.05) for wall in walls for attribute, low, high in
+                 (('x', wall.x - 1, wall.x + 1), ('y', wall.y - 1, wall.y + 1), ('length', 1.0, 3.0), ('thickness', 0.1, 0.3))]
+    start = time.perf_counter(); result = optimize_layout(elements, (5.0, 4.0), variables, samples=100000, workers=1, seed=2)
+    assert time.perf_counter() - start < 30 and result['evaluated'] < 100000 + 8 * 200 * (2 * len(variables) + 64)
+
+def test_cancel_returns_none():
+    elements = plan(2); cancel = threading.Event(); cancel.set()
+    assert optimize_layout(elements, (5.0, 4.0), [DesignVariable(elements[-1], 'x', 0, 10)], samples=50000, workers=1, cancel=cancel) is None
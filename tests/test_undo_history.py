@@ -0,0 +1,17 @@
+from centros_core import UndoHistory
+
+def recount(history):
+    return sum(map(UndoHistory.entry_size, history.undo_stack)) + sum(map(UndoHistory.entry_size, history.redo_stack))
+
+def move(dx): return {'kind': 'move', 'element': object(), 'dx': dx, 'dy': 0.0}
+
+def test_memory_size_tracks_every_operation():
+    history = UndoHistory(limit=3)
+    history.push({'kind': 'batch', 'entries': [move(1.0), move(2.0)]}); assert history.memory_size() == recount(history)
+    for i in range(5): history.push(move(float(i)))  # desborda el límite: se descartan las más antiguas
+    assert len(history.undo_stack) == 3 and history.memory_size() == recount(history)
+    history.push(move(1.0), merge_key='k'); history.push(move(1.0), merge_key='k'); assert history.memory_size() == recount(history)
+    history.pop_undo(); history.pop_undo(); assert history.memory_size() == recount(history)
+    history.pop_redo(); assert history.memory_size() == recount(history)
+    history.push(move(3.0)); assert not history.redo_stack and history.memory_size() == recount(history)
+    history.clear(); assert history.memory_size() == 0